@@ -4,5 +4,6 @@ from app.config import Config
 app = create_app()
 
 if __name__ == '__main__':
-    # Ejecutar la aplicación en modo desarrollo (debug=True para recarga automática y mensajes detallados)
+    # Ejecutar la aplicación en modo desarrollo (debug=True para recarga automática y mensajes detallados).
+    # En producción usar gunicorn con varios procesos: gunicorn -c gunicorn.conf.py
    app.run(host='0.0.0.0', port=Config.PORT, debug=True) #desarrollo local
\ No newline at end of file
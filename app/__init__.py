@@ -1,7 +1,9 @@
 from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_pymongo import PyMongo
-from .config import Config
+from .config import Config, opciones_mongo
+from .json_provider import BSONJSONProvider
+from .metricas import escucha_comandos, registrar_metricas
 
 # Instancia global para la conexión a MongoDB que se inicializará con la app
 mongo = PyMongo()
@@ -17,8 +19,13 @@ def create_app():
     app.url_map.strict_slashes = False
 
     # Inicializar extensiones con la app
-    mongo.init_app(app)   # Conectar MongoDB con Flask
+    # Conectar MongoDB con Flask. El cliente no abre conexiones hasta la primera consulta
+    # (connect=False), así que cada proceso de gunicorn crea las suyas después del fork.
+    # escucha_comandos atribuye cada consulta a la ruta que la envía (ver /api/metrics)
+    mongo.init_app(app, connect=False, event_listeners=[escucha_comandos], **opciones_mongo())
+    app.json = BSONJSONProvider(app)  # Serializar ObjectId y datetime en las respuestas JSON
     CORS(app)             # Habilitar CORS para permitir peticiones desde otros orígenes
+    registrar_metricas(app)  # Medir duración y consultas a MongoDB de cada petición
 
     # Importar y registrar los blueprints (módulos de rutas) con sus prefijos de URL
     from .routes.votantes import votantes_bp
@@ -26,12 +33,33 @@ def create_app():
     from .routes.propuestas import propuestas_bp
     from .routes.administradores import administradores_bp
     from .routes.estadisticas import estadisticas_bp
+    from .routes.metricas import metricas_bp
+    from .routes.importacion import importacion_bp
+    from .routes.exportacion import exportacion_bp
 
     app.register_blueprint(votantes_bp, url_prefix='/api/votante')
     app.register_blueprint(politicos_bp, url_prefix='/api/politico')
     app.register_blueprint(propuestas_bp, url_prefix='/api/propuesta')
     app.register_blueprint(administradores_bp, url_prefix='/api/administrador')
     app.register_blueprint(estadisticas_bp, url_prefix='/api/estadisticas')
+    app.register_blueprint(metricas_bp, url_prefix='/api/metrics')
+    app.register_blueprint(importacion_bp, url_prefix='/api/importar')
+    app.register_blueprint(exportacion_bp, url_prefix='/api/exportar')
+
+    # Registrar los comandos de administración (flask migrar-votos, ...)
+    from .comandos import registrar_comandos
+    registrar_comandos(app)
+
+    # Trabajos en segundo plano que quedaron a medias en un proceso que ya no existe
+    from .trabajos import revisar_trabajos_abandonados
+    revisar_trabajos_abandonados()
+
+    # Crear los índices declarados al arrancar (opcional; también con `flask crear-indices`)
+    if app.config['CREAR_INDICES_AL_INICIAR']:
+        from .indices import aplicar_indices
+        for coleccion, nombre, error in aplicar_indices():
+            if error:
+                app.logger.error('No se pudo crear el índice %s de %s: %s', nombre, coleccion, error)
 
     # Ruta raíz para verificar que la API está corriendo correctamente
     @app.route('/')
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from pymongo import AsyncMongoClient
+from app.config import Config, opciones_mongo
+from app.trabajos import registrar_trabajo
+
+# Trabajos asíncronos: se ejecutan como corrutinas en un bucle de eventos propio
+# del proceso (en un hilo dedicado), con el driver asíncrono de MongoDB.
+# Mientras esperan al modelo o a la BD no ocupan ningún hilo, así que un proceso
+# puede tener cientos de evaluaciones en curso. El estado se guarda en la misma
+# colección v_trabajos que los trabajos del pool de hilos.
+
+logger = logging.getLogger(__name__)
+
+# Bucle de eventos del proceso actual (se crea bajo demanda y se recrea tras un fork)
+_loop = None
+_loop_pid = None
+_loop_lock = threading.Lock()
+
+# Cliente asíncrono de MongoDB y límite de trabajos en curso; solo se usan desde el bucle
+_estado = {'cliente': None, 'limite': None}
+
+
+def obtener_loop():
+    """Devuelve el bucle de eventos del proceso, arrancando su hilo si no existe."""
+    global _loop, _loop_pid
+    with _loop_lock:
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            _estado.update(cliente=None, limite=None)
+            threading.Thread(target=_loop.run_forever, name='asincrono', daemon=True).start()
+        return _loop
+
+
+def obtener_db():
+    """
+    Base de datos de MongoDB a través del cliente asíncrono (la de MONGO_URI).
+    El cliente se crea la primera vez; solo debe llamarse desde el bucle del proceso.
+    """
+    if _estado['cliente'] is None:
+        _estado['cliente'] = AsyncMongoClient(Config.MONGO_URI, **opciones_mongo())
+    return _estado['cliente'].get_default_database()
+
+
+def _limite():
+    """Semáforo que limita los trabajos en curso a Config.ASYNC_TRABAJOS_MAXIMO."""
+    if _estado['limite'] is None:
+        _estado['limite'] = asyncio.Semaphore(Config.ASYNC_TRABAJOS_MAXIMO)
+    return _estado['limite']
+
+
+def encolar_trabajo_async(tipo, datos, corrutina):
+    """
+    Registra un trabajo en estado 'pendiente' y lo programa en el bucle de eventos.
+    corrutina(id_trabajo, datos) se espera en segundo plano y su valor de retorno
+    se guarda como resultado del trabajo.
+    Devuelve el id del trabajo como string.
+    """
+    id_trabajo = registrar_trabajo(tipo, datos)
+    asyncio.run_coroutine_threadsafe(_ejecutar(id_trabajo, datos, corrutina), obtener_loop())
+    return str(id_trabajo)
+
+
+async def actualizar_trabajo(id_trabajo, **campos):
+    """Actualiza los campos indicados de un trabajo (estado, etapa, resultado...)."""
+    campos['fecha_actualizacion'] = datetime.now(timezone.utc)
+    await obtener_db().v_trabajos.update_one({'_id': id_trabajo}, {'$set': campos})
+
+
+async def reintentar(id_trabajo, corrutina, *args):
+    """
+    Espera corrutina(*args) hasta Config.TRABAJOS_REINTENTOS veces, con espera
+    exponencial entre intentos. Cada intento fallido queda registrado en el trabajo.
+    Si todos fallan, relanza la última excepción.
+    """
+    db_trabajos = obtener_db().v_trabajos
+    for intento in range(1, Config.TRABAJOS_REINTENTOS + 1):
+        await db_trabajos.update_one({'_id': id_trabajo}, {'$inc': {'intentos': 1}})
+        try:
+            return await corrutina(*args)
+        except Exception as e:
+            await db_trabajos.update_one(
+                {'_id': id_trabajo},
+                {'$push': {'errores': {'intento': intento, 'error': str(e)}}}
+            )
+            if intento == Config.TRABAJOS_REINTENTOS:
+                raise
+            await asyncio.sleep(Config.TRABAJOS_ESPERA_REINTENTO * 2 ** (intento - 1))
+
+
+async def _ejecutar(id_trabajo, datos, corrutina):
+    """Ejecuta un trabajo en el bucle y registra su resultado o su fallo."""
+    async with _limite():
+        try:
+            await actualizar_trabajo(id_trabajo, estado='en_proceso')
+            resultado = await corrutina(id_trabajo, datos)
+            await actualizar_trabajo(id_trabajo, estado='completado', etapa=None, resultado=resultado)
+        except Exception as e:
+            logger.exception('Trabajo %s fallido', id_trabajo)
+            try:
+                await actualizar_trabajo(id_trabajo, estado='fallido', error=str(e))
+            except Exception:
+                logger.exception('No se pudo registrar el fallo del trabajo %s', id_trabajo)
@@ -1,12 +1,110 @@
+import logging
+import threading
+import time
+from datetime import datetime, timezone
 from functools import wraps
 from flask import request, jsonify
 import jwt
+from app import mongo
+from app.cache import CacheLRU
 from app.config import Config
+from app.indices import aplicar_indices
 from jwt.exceptions import ExpiredSignatureError, InvalidTokenError
 
 JWT_ALGORITHM = Config.JWT_ALGORITHM
 SECRET_KEY = Config.SECRET_KEY
 
+logger = logging.getLogger(__name__)
+
+# Tokens ya verificados: token -> payload. Cada entrada expira junto con el token,
+# así las rutas autenticadas no vuelven a verificar la firma en cada petición.
+tokens_verificados = CacheLRU('tokens', maxsize=Config.CACHE_TOKENS_MAXSIZE, ttl=Config.JWT_EXPIRACION)
+
+# Tokens revocados (cierre de sesión). Se guardan en MongoDB para compartirlos entre
+# procesos, y cada proceso mantiene una copia local de sus jti que refresca cada
+# REVOCACION_SINCRONIZACION segundos; la comprobación por petición es un lookup en memoria.
+db_revocados = mongo.db.v_tokens_revocados
+_revocados = set()
+_revocados_sincronizado = 0.0
+_revocados_lock = threading.Lock()
+
+# El índice TTL que borra las revocaciones expiradas se asegura una vez por proceso,
+# antes de la primera revocación (y en cada revocación mientras falle)
+_indices_listos = False
+_indices_lock = threading.Lock()
+
+
+def asegurar_indices():
+    """
+    Crea (si no existe) el índice TTL de v_tokens_revocados. Es idempotente.
+    Sin él las revocaciones nunca se borran y sincronizar_revocados lee cada vez más
+    documentos; si no se pudo crear lo registra en el log y lo reintenta.
+    """
+    global _indices_listos
+    with _indices_lock:
+        if _indices_listos:
+            return
+        errores = [
+            (coleccion, nombre, error)
+            for coleccion, nombre, error in aplicar_indices(['v_tokens_revocados'])
+            if error
+        ]
+        for coleccion, nombre, error in errores:
+            logger.error('No se pudo crear el índice %s de %s: %s', nombre, coleccion, error)
+        _indices_listos = not errores
+
+
+def sincronizar_revocados():
+    """Recarga desde MongoDB los jti revocados que aún no han expirado."""
+    global _revocados, _revocados_sincronizado
+    ahora = datetime.now(timezone.utc)
+    jtis = {doc['_id'] for doc in db_revocados.find({'expira': {'$gt': ahora}}, {'_id': 1})}
+    with _revocados_lock:
+        _revocados = jtis
+        _revocados_sincronizado = time.monotonic()
+
+
+def token_revocado(payload):
+    """True si el jti del token está en la lista de revocados."""
+    if time.monotonic() - _revocados_sincronizado > Config.REVOCACION_SINCRONIZACION:
+        sincronizar_revocados()
+    return payload.get('jti') in _revocados
+
+
+def revocar_token(token, payload):
+    """Revoca un token (hasta su expiración) en todos los procesos."""
+    jti = payload.get('jti')
+    if jti is None:
+        return
+    asegurar_indices()
+    expira = datetime.fromtimestamp(payload['exp'], timezone.utc)
+    db_revocados.update_one({'_id': jti}, {'$set': {'expira': expira}}, upsert=True)
+    with _revocados_lock:
+        _revocados.add(jti)
+    tokens_verificados.delete(token)
+
+
+def verificar_token(token):
+    """
+    Devuelve el payload de un token válido. Usa la caché de tokens verificados y,
+    si no está, decodifica y verifica la firma y la expiración (exp es obligatorio).
+    Lanza ExpiredSignatureError o InvalidTokenError si no es válido.
+    """
+    payload = tokens_verificados.get(token)
+    if payload is None:
+        # jwt.decode requiere algoritmo(s) como lista
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[JWT_ALGORITHM], options={'require': ['exp']})
+        restante = payload['exp'] - time.time()
+        if restante > 0:
+            tokens_verificados.set(token, payload, ttl=restante)
+    elif payload['exp'] <= time.time():
+        raise ExpiredSignatureError('Signature has expired')
+
+    if token_revocado(payload):
+        raise InvalidTokenError('Token revocado')
+    return payload
+
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -21,9 +119,10 @@ def token_required(f):
             return jsonify({'error': 'Token no proporcionado'}), 401
 
         try:
-            # jwt.decode requiere algoritmo(s) como lista
-            data = jwt.decode(token, SECRET_KEY, algorithms=[JWT_ALGORITHM])
+            data = verificar_token(token)
             request.votante_id = data['votante_id']
+            request.token = token
+            request.token_payload = data
         except ExpiredSignatureError:
             return jsonify({'error': 'Token expirado'}), 401
         except InvalidTokenError:
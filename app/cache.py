@@ -0,0 +1,144 @@
+import threading
+import time
+from collections import OrderedDict
+from app.config import Config
+from app.versiones import obtener_version
+
+# Registro de todas las cachés del proceso, para exponer sus estadísticas
+CACHES = {}
+
+
+class CacheLRU:
+    """
+    Caché en memoria con política LRU y tiempo de vida (TTL) por entrada.
+    Es segura entre hilos y lleva contadores de aciertos y fallos.
+    """
+
+    def __init__(self, nombre, maxsize, ttl):
+        self.nombre = nombre
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.aciertos = 0
+        self.fallos = 0
+        self._datos = OrderedDict()  # clave -> (expira, valor)
+        self._lock = threading.Lock()
+        CACHES[nombre] = self
+
+    def get(self, clave, defecto=None):
+        """Devuelve el valor guardado o defecto si no existe o ya expiró."""
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None or entrada[0] <= time.monotonic():
+                if entrada is not None:
+                    del self._datos[clave]
+                self.fallos += 1
+                return defecto
+
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return entrada[1]
+
+    def set(self, clave, valor, ttl=None):
+        """Guarda un valor; ttl permite un tiempo de vida distinto al de la caché."""
+        expira = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._datos[clave] = (expira, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maxsize:
+                self._datos.popitem(last=False)
+
+    def delete(self, clave):
+        """Elimina una entrada si existe."""
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def clear(self):
+        """Vacía la caché (los contadores se conservan)."""
+        with self._lock:
+            self._datos.clear()
+
+    def estadisticas(self):
+        """Devuelve tamaño, aciertos, fallos y tasa de aciertos."""
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                'entradas': len(self._datos),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': self.aciertos / total if total else 0.0,
+            }
+
+
+def estadisticas_caches():
+    """Devuelve las estadísticas de todas las cachés registradas."""
+    return {nombre: cache.estadisticas() for nombre, cache in CACHES.items()}
+
+
+class CacheDocumentos:
+    """
+    Caché de lectura (read-through) de documentos de una colección por _id y por correo.
+    Los documentos se guardan por _id; el correo solo apunta al _id, así que invalidar
+    un _id basta para que tampoco se sirva por correo.
+
+    Cada entrada lleva la versión de la colección (app/versiones.py) leída ANTES de
+    consultar el documento, y deja de servirse en cuanto la versión cambia: así una
+    escritura en otro proceso también la invalida, y una lectura que empezó antes de
+    la escritura no puede dejar el documento anterior como vigente. Las escrituras de
+    otro proceso se ven con un retraso máximo de VERSIONES_TTL (lo que tarda este
+    proceso en releer la versión), no de CACHE_DOCUMENTOS_TTL.
+    Las rutas de escritura deben incrementar la versión de la colección y llamar a
+    invalidar() después de modificar un documento.
+    """
+
+    def __init__(self, nombre, coleccion):
+        self.coleccion = coleccion
+        self.documentos = CacheLRU(nombre, maxsize=Config.CACHE_DOCUMENTOS_MAXSIZE, ttl=Config.CACHE_DOCUMENTOS_TTL)
+        self._correos = CacheLRU(f'{nombre}_correo', maxsize=Config.CACHE_DOCUMENTOS_MAXSIZE, ttl=Config.CACHE_DOCUMENTOS_TTL)
+
+    def _version(self):
+        return obtener_version(self.coleccion.name)
+
+    def _guardar(self, documento, version):
+        self.documentos.set(documento['_id'], (version, documento))
+        if documento.get('correo'):
+            self._correos.set(documento['correo'], documento['_id'])
+
+    def _vigente(self, id_documento, version):
+        """Documento en caché si se guardó con la versión actual de la colección."""
+        entrada = self.documentos.get(id_documento)
+        if entrada is None or entrada[0] != version:
+            return None
+        return entrada[1]
+
+    def por_id(self, id_documento):
+        """Devuelve una copia del documento con ese _id (ObjectId) o None si no existe."""
+        version = self._version()
+        documento = self._vigente(id_documento, version)
+        if documento is None:
+            documento = self.coleccion.find_one({'_id': id_documento})
+            if documento is None:
+                return None
+            self._guardar(documento, version)
+        return dict(documento)
+
+    def por_correo(self, correo):
+        """Devuelve una copia del documento con ese correo o None si no existe."""
+        version = self._version()
+        id_documento = self._correos.get(correo)
+        if id_documento is not None:
+            documento = self._vigente(id_documento, version)
+            if documento is not None and documento.get('correo') == correo:
+                return dict(documento)
+
+        documento = self.coleccion.find_one({'correo': correo})
+        if documento is None:
+            return None
+        self._guardar(documento, version)
+        return dict(documento)
+
+    def invalidar(self, *ids_documentos):
+        """Elimina de la caché los documentos indicados (después de actualizarlos o borrarlos)."""
+        for id_documento in ids_documentos:
+            self.documentos.delete(id_documento)
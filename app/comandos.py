@@ -0,0 +1,171 @@
+import json
+import os
+import click
+
+
+def registrar_comandos(app):
+    """Registra los comandos de administración disponibles con `flask <comando>`."""
+
+    @app.cli.command('migrar-votos')
+    @click.option('--batch-size', default=500, show_default=True,
+                  help='Número de propuestas migradas por lote.')
+    def migrar_votos(batch_size):
+        """Mueve los votos embebidos en v_propuestas.votos a la colección v_votos."""
+        from app.votos import migrar_votos_embebidos
+
+        propuestas, votos, rechazados = migrar_votos_embebidos(batch_size)
+        click.echo(f'Propuestas migradas: {propuestas}. Votos migrados: {votos}.')
+        if rechazados:
+            click.echo(f'Votos no migrados (id_votante inválido, copiados a v_votos_rechazados): {rechazados}.')
+
+    @app.cli.command('recalcular-conteos')
+    def recalcular_conteos():
+        """Reconstruye total_votos de las propuestas y los conteos por político y categoría."""
+        from app.votos import recalcular_conteos as recalcular
+
+        propuestas = recalcular()
+        click.echo(f'Conteos recalculados. Propuestas con votos: {propuestas}.')
+
+    @app.cli.command('crear-indices')
+    def crear_indices():
+        """Crea (si no existen) los índices declarados en app/indices.py."""
+        from app.indices import aplicar_indices
+
+        errores = 0
+        for coleccion, indice, error in aplicar_indices():
+            if error:
+                errores += 1
+                click.echo(f'ERROR  {coleccion}.{indice}: {error}')
+            else:
+                click.echo(f'OK     {coleccion}.{indice}')
+        if errores:
+            raise SystemExit(1)
+
+    @app.cli.command('auditar-consultas')
+    def auditar_consultas():
+        """Ejecuta explain() sobre las consultas de cada ruta y marca las que hacen COLLSCAN."""
+        from app.indices import auditar_consultas as auditar
+
+        collscans = 0
+        for ruta, coleccion, etapas, collscan in auditar():
+            if collscan:
+                collscans += 1
+            estado = 'COLLSCAN' if collscan else 'OK'
+            click.echo(f'{estado:<9}{ruta} [{coleccion}] {" > ".join(etapas)}')
+        if collscans:
+            click.echo(f'{collscans} consulta(s) recorren la colección completa.')
+            raise SystemExit(1)
+
+    @app.cli.command('importar')
+    @click.argument('tipo', type=click.Choice(['votantes', 'politicos', 'propuestas']))
+    @click.argument('archivo', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--formato', type=click.Choice(['csv', 'ndjson']),
+                  help='Formato del archivo (por defecto, según su extensión).')
+    @click.option('--reanudar', 'id_reanudar', help='Id de una importación interrumpida a continuar.')
+    @click.option('--batch-size', type=int, help='Filas por lote (IMPORTACION_LOTE por defecto).')
+    @click.option('--reporte', type=click.Path(dir_okay=False),
+                  help='Archivo NDJSON donde escribir las filas rechazadas y sus errores.')
+    def importar(tipo, archivo, formato, id_reanudar, batch_size, reporte):
+        """Importa votantes, políticos o propuestas desde un archivo CSV o NDJSON."""
+        from app.importacion import db_errores, importar as importar_archivo, iniciar_importacion
+
+        formato = formato or ('csv' if archivo.lower().endswith('.csv') else 'ndjson')
+        try:
+            importacion = iniciar_importacion(tipo, formato, id_reanudar)
+        except ValueError as e:
+            raise click.BadParameter(str(e))
+
+        click.echo(f'Importación {importacion["_id"]} (usar --reanudar con este id si se interrumpe)')
+        with open(archivo, encoding='utf-8-sig', newline='') as lineas:
+            resultado = importar_archivo(importacion, lineas, batch_size)
+
+        click.echo(f'Filas procesadas: {resultado["filas_procesadas"]}. Insertados: {resultado["insertados"]}. '
+                   f'Errores: {resultado["errores"]}.')
+        if reporte:
+            with open(reporte, 'w', encoding='utf-8') as salida:
+                for error in db_errores.find({'id_importacion': importacion['_id']}).sort('fila', 1):
+                    salida.write(json.dumps({'fila': error['fila'], 'errores': error['errores']}, ensure_ascii=False) + '\n')
+            click.echo(f'Reporte de errores: {reporte}')
+        if resultado['errores']:
+            raise SystemExit(1)
+
+    @app.cli.command('exportar-votos')
+    @click.argument('salida', type=click.Path(dir_okay=False))
+    @click.option('--formato', type=click.Choice(['ndjson', 'csv']), default='ndjson', show_default=True,
+                  help='NDJSON o CSV comprimido con gzip.')
+    @click.option('--batch-size', type=int, help='Votos por lote del cursor (STREAMING_BATCH_SIZE por defecto).')
+    @click.option('--reanudar', is_flag=True,
+                  help='Continuar una exportación interrumpida desde su punto de control.')
+    def exportar_votos_archivo(salida, formato, batch_size, reanudar):
+        """
+        Exporta todos los votos a un archivo, una fila por voto. Tras cada lote guarda en
+        <salida>.checkpoint el id del último voto escrito y el tamaño del archivo hasta ese
+        lote; con --reanudar recorta el archivo a ese tamaño (descarta un lote escrito a
+        medias o sin registrar) y continúa desde el voto siguiente.
+        """
+        from app.config import Config
+        from app.exportacion import exportar_votos
+        from app.utils import a_object_id
+
+        checkpoint = salida + '.checkpoint'
+
+        def guardar_checkpoint(ultimo, posicion):
+            # Se escribe aparte y se renombra: el punto de control nunca queda a medias
+            with open(checkpoint + '.tmp', 'w', encoding='utf-8') as control:
+                control.write(f'{ultimo or "-"} {posicion}')
+                control.flush()
+                os.fsync(control.fileno())
+            os.replace(checkpoint + '.tmp', checkpoint)
+
+        desde = None
+        posicion = 0
+        if reanudar:
+            if not os.path.exists(checkpoint):
+                raise click.BadParameter(f'No hay punto de control en {checkpoint}')
+            with open(checkpoint, encoding='utf-8') as control:
+                ultimo, posicion = control.read().split()
+            desde = a_object_id(ultimo)
+            posicion = int(posicion)
+        else:
+            guardar_checkpoint(None, 0)
+
+        lotes = 0
+        with open(salida, 'r+b' if reanudar else 'wb') as archivo:
+            archivo.truncate(posicion)
+            archivo.seek(posicion)
+            for bloque, ultimo in exportar_votos(formato, batch_size or Config.STREAMING_BATCH_SIZE, desde):
+                archivo.write(bloque)
+                archivo.flush()
+                os.fsync(archivo.fileno())
+                if ultimo is not None:
+                    guardar_checkpoint(ultimo, archivo.tell())
+                lotes += 1
+
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        click.echo(f'Exportación completa en {salida} ({lotes} bloques).')
+
+    @app.cli.command('recomendar')
+    @click.argument('salida', type=click.Path(dir_okay=False))
+    @click.option('--k', default=10, show_default=True, help='Propuestas recomendadas por votante.')
+    def recomendar(salida, k):
+        """
+        Calcula las k propuestas más similares de cada votante del padrón y las escribe
+        en NDJSON: {"id_votante": ..., "recomendaciones": [{"id_propuesta": ..., "similitud": ...}]}.
+        """
+        import time
+        from app.recomendaciones import cargar_indice
+
+        inicio = time.perf_counter()
+        votantes = 0
+        with open(salida, 'w', encoding='utf-8') as archivo:
+            for id_votante, recomendadas in cargar_indice().recomendar_todos(k):
+                archivo.write(json.dumps({
+                    'id_votante': str(id_votante),
+                    'recomendaciones': [
+                        {'id_propuesta': str(id_propuesta), 'similitud': round(similitud, 6)}
+                        for id_propuesta, similitud in recomendadas
+                    ],
+                }) + '\n')
+                votantes += 1
+        click.echo(f'Recomendaciones de {votantes} votantes en {salida} ({time.perf_counter() - inicio:.1f} s).')
@@ -11,6 +11,106 @@ class Config:
     # URI de conexión para MongoDB, extraída de las variables de entorno
     MONGO_URI = os.getenv('MONGO_URI')
 
+    # Pool de conexiones y tiempos de espera (ms) de cada cliente de MongoDB.
+    # Cada proceso de gunicorn tiene su propio cliente, así que el total de conexiones
+    # es como máximo SERVIDOR_WORKERS * MONGO_MAX_POOL_SIZE.
+    MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', 50))
+    MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', 0))
+    MONGO_MAX_IDLE_TIME_MS = int(os.getenv('MONGO_MAX_IDLE_TIME_MS', 60000))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', 5000))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.getenv('MONGO_SOCKET_TIMEOUT_MS', 30000))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', 5000))
+
+    # Servidor de producción (gunicorn.conf.py): procesos, hilos por proceso y timeout en segundos
+    SERVIDOR_WORKERS = int(os.getenv('SERVIDOR_WORKERS', (os.cpu_count() or 1) * 2 + 1))
+    SERVIDOR_THREADS = int(os.getenv('SERVIDOR_THREADS', 4))
+    SERVIDOR_TIMEOUT = int(os.getenv('SERVIDOR_TIMEOUT', 60))
+
     # Algoritmo que se usará para la codificación y decodificación JWT; por defecto HS256
     JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
-    PORT = int(os.environ.get("PORT", 5000))
\ No newline at end of file
+    PORT = int(os.environ.get("PORT", 5000))
+
+    # Paginación por cursor (keyset sobre _id) de los listados
+    PAGINACION_LIMITE_DEFECTO = int(os.getenv('PAGINACION_LIMITE_DEFECTO', 50))
+    PAGINACION_LIMITE_MAXIMO = int(os.getenv('PAGINACION_LIMITE_MAXIMO', 500))
+
+    # Lecturas en streaming (?stream=ndjson|json): documentos por lote del cursor
+    STREAMING_BATCH_SIZE = int(os.getenv('STREAMING_BATCH_SIZE', 1000))
+    STREAMING_BATCH_SIZE_MAXIMO = int(os.getenv('STREAMING_BATCH_SIZE_MAXIMO', 10000))
+
+    # Modelo de IA para valorar propuestas: 'gemini' (API real) o 'local' (sustituto sin red)
+    MODELO_EVALUACION = os.getenv('MODELO_EVALUACION', 'gemini')
+    GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+    GEMINI_MODELO = os.getenv('GEMINI_MODELO', 'gemini-2.0-flash')
+
+    # Trabajos en segundo plano (evaluación de propuestas y votos automáticos)
+    TRABAJOS_WORKERS = int(os.getenv('TRABAJOS_WORKERS', 4))
+    TRABAJOS_REINTENTOS = int(os.getenv('TRABAJOS_REINTENTOS', 3))
+    TRABAJOS_ESPERA_REINTENTO = float(os.getenv('TRABAJOS_ESPERA_REINTENTO', 1))
+    # Segundos sin avance tras los que un trabajo pendiente o en proceso se da por abandonado
+    # (su proceso terminó) y se marca como fallido
+    TRABAJOS_TIMEOUT = int(os.getenv('TRABAJOS_TIMEOUT', 900))
+
+    # Caché de evaluaciones del modelo (LRU + TTL en memoria y nivel persistente opcional en MongoDB)
+    CACHE_EVALUACION_MAXSIZE = int(os.getenv('CACHE_EVALUACION_MAXSIZE', 10000))
+    CACHE_EVALUACION_TTL = int(os.getenv('CACHE_EVALUACION_TTL', 24 * 3600))
+    CACHE_EVALUACION_PERSISTENTE = os.getenv('CACHE_EVALUACION_PERSISTENTE', 'false').lower() == 'true'
+
+    # Número máximo de votos aceptados por POST /api/propuesta/vote/batch
+    VOTOS_LOTE_MAXIMO = int(os.getenv('VOTOS_LOTE_MAXIMO', 1000))
+
+    # Tamaño máximo de los rankings de /api/estadisticas/ranking/*
+    RANKING_MAXIMO = int(os.getenv('RANKING_MAXIMO', 100))
+
+    # Segundos que se reutiliza el snapshot de /api/estadisticas/dashboard antes de recalcularlo
+    DASHBOARD_TTL = int(os.getenv('DASHBOARD_TTL', 30))
+
+    # Crear los índices declarados en app/indices.py al arrancar la app
+    CREAR_INDICES_AL_INICIAR = os.getenv('CREAR_INDICES_AL_INICIAR', 'false').lower() == 'true'
+
+    # bcrypt: factor de trabajo de los hashes nuevos y pool acotado donde se calculan
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))
+    BCRYPT_WORKERS = int(os.getenv('BCRYPT_WORKERS', os.cpu_count() or 2))
+    BCRYPT_COLA_MAXIMA = int(os.getenv('BCRYPT_COLA_MAXIMA', 32))
+
+    # Tokens JWT: vigencia en segundos, caché de tokens verificados y
+    # cada cuántos segundos se sincroniza la lista de tokens revocados
+    JWT_EXPIRACION = int(os.getenv('JWT_EXPIRACION', 24 * 3600))
+    CACHE_TOKENS_MAXSIZE = int(os.getenv('CACHE_TOKENS_MAXSIZE', 10000))
+    REVOCACION_SINCRONIZACION = int(os.getenv('REVOCACION_SINCRONIZACION', 5))
+
+    # Segundos que cada proceso reutiliza las versiones de colección usadas en los ETag
+    VERSIONES_TTL = float(os.getenv('VERSIONES_TTL', 1))
+
+    # Caché de lectura de documentos individuales (por _id y por correo) en cada proceso
+    CACHE_DOCUMENTOS_MAXSIZE = int(os.getenv('CACHE_DOCUMENTOS_MAXSIZE', 5000))
+    CACHE_DOCUMENTOS_TTL = int(os.getenv('CACHE_DOCUMENTOS_TTL', 10))
+
+    # Trabajos asíncronos (POST /api/propuesta/async): máximo de trabajos en curso por proceso
+    ASYNC_TRABAJOS_MAXIMO = int(os.getenv('ASYNC_TRABAJOS_MAXIMO', 200))
+
+    # Importación masiva (flask importar / POST /api/importar/<tipo>): filas por lote
+    IMPORTACION_LOTE = int(os.getenv('IMPORTACION_LOTE', 1000))
+
+    # Recomendaciones por similitud (GET /api/votante/<id>/recomendaciones): propuestas por defecto
+    # y máximas por respuesta, segundos entre actualizaciones incrementales y entre recargas
+    # completas del índice, y votantes/propuestas por bloque en el cálculo de todo el padrón
+    RECOMENDACIONES_K = int(os.getenv('RECOMENDACIONES_K', 10))
+    RECOMENDACIONES_K_MAXIMO = int(os.getenv('RECOMENDACIONES_K_MAXIMO', 100))
+    RECOMENDACIONES_INTERVALO = int(os.getenv('RECOMENDACIONES_INTERVALO', 60))
+    RECOMENDACIONES_RECARGA = int(os.getenv('RECOMENDACIONES_RECARGA', 3600))
+    RECOMENDACIONES_BLOQUE = int(os.getenv('RECOMENDACIONES_BLOQUE', 1024))
+
+
+def opciones_mongo():
+    """Opciones de pool y tiempos de espera para los clientes de MongoDB (síncrono y asíncrono)."""
+    return {
+        'maxPoolSize': Config.MONGO_MAX_POOL_SIZE,
+        'minPoolSize': Config.MONGO_MIN_POOL_SIZE,
+        'maxIdleTimeMS': Config.MONGO_MAX_IDLE_TIME_MS,
+        'connectTimeoutMS': Config.MONGO_CONNECT_TIMEOUT_MS,
+        'serverSelectionTimeoutMS': Config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        'socketTimeoutMS': Config.MONGO_SOCKET_TIMEOUT_MS,
+        'waitQueueTimeoutMS': Config.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    }
@@ -0,0 +1,270 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from google import genai
+from app import mongo
+from app.asincrono import obtener_db
+from app.cache import CacheLRU
+from app.config import Config
+from app.indices import aplicar_indices
+
+# Prompt para que el modelo de IA valore una propuesta con las preguntas de su categoría
+PROMPT_EVALUACION = """
+        Evalúa la siguiente propuesta política y responde solo con los números (separados por comas) de las calificaciones del 1 al 5, según corresponda a cada pregunta. No agregues texto adicional, solo los números en el orden de las preguntas.
+
+        Categoría de la propuesta:
+        {categoria}
+        
+        Título:
+        {titulo}
+
+        Propuesta:
+        {descripcion}
+
+        Preguntas:
+        {preguntas}
+
+        Devuelve la respuesta en el formato:
+        número,número,número (por ejemplo: 5,4,3)
+        """
+
+
+# Caché de evaluaciones en memoria, por hash de las entradas del prompt
+cache_evaluaciones = CacheLRU(
+    'evaluaciones',
+    maxsize=Config.CACHE_EVALUACION_MAXSIZE,
+    ttl=Config.CACHE_EVALUACION_TTL
+)
+
+# Nivel persistente opcional de la caché (compartido entre procesos). Cada entrada guarda
+# su fecha y un índice TTL la borra a los CACHE_EVALUACION_TTL segundos, igual que en memoria
+db_evaluaciones = mongo.db.v_evaluaciones
+
+logger = logging.getLogger(__name__)
+
+# El índice TTL se asegura una vez por proceso, antes de la primera escritura en el
+# nivel persistente (y en cada escritura mientras falle)
+_indices_listos = False
+_indices_lock = threading.Lock()
+
+# Contadores del nivel persistente y de llamadas reales al modelo
+contadores_evaluacion = {'aciertos_persistentes': 0, 'llamadas_modelo': 0}
+_contadores_lock = threading.Lock()
+
+# Modelo compartido por todo el proceso (se recrea tras un fork)
+_modelo = None
+_modelo_pid = None
+_modelo_lock = threading.Lock()
+
+
+class ModeloGemini:
+    """Modelo de evaluación real: llama a la API de Gemini con un único cliente reutilizable."""
+
+    def __init__(self):
+        self.client = genai.Client(api_key=Config.GEMINI_API_KEY)
+
+    def generar(self, prompt):
+        response = self.client.models.generate_content(
+            model=Config.GEMINI_MODELO,
+            contents=prompt,
+        )
+        return response.text
+
+    async def generar_async(self, prompt):
+        response = await self.client.aio.models.generate_content(
+            model=Config.GEMINI_MODELO,
+            contents=prompt,
+        )
+        return response.text
+
+
+class ModeloLocal:
+    """
+    Modelo sustituto que no usa la red, para pruebas y desarrollo sin conexión.
+    Devuelve calificaciones deterministas (1 a 5) calculadas a partir del prompt.
+    """
+
+    def generar(self, prompt):
+        digest = hashlib.sha256(prompt.encode('utf-8')).digest()
+        return ','.join(str(b % 5 + 1) for b in digest[:3])
+
+    async def generar_async(self, prompt):
+        return self.generar(prompt)
+
+
+MODELOS = {
+    'gemini': ModeloGemini,
+    'local': ModeloLocal,
+}
+
+
+def obtener_modelo():
+    """
+    Devuelve el modelo configurado en Config.MODELO_EVALUACION ('gemini' o 'local').
+    Se crea una sola vez por proceso y se reutiliza en todas las peticiones.
+    """
+    global _modelo, _modelo_pid
+    with _modelo_lock:
+        if _modelo is None or _modelo_pid != os.getpid():
+            try:
+                _modelo = MODELOS[Config.MODELO_EVALUACION]()
+            except KeyError:
+                raise ValueError(f'Modelo de evaluación desconocido: {Config.MODELO_EVALUACION}')
+            _modelo_pid = os.getpid()
+        return _modelo
+
+
+def asegurar_indices():
+    """
+    Crea (si no existe) el índice TTL de v_evaluaciones. Es idempotente.
+    Si no se pudo crear lo registra en el log y lo reintenta en la siguiente escritura.
+    """
+    global _indices_listos
+    with _indices_lock:
+        if _indices_listos:
+            return
+        errores = [
+            (coleccion, nombre, error)
+            for coleccion, nombre, error in aplicar_indices(['v_evaluaciones'])
+            if error
+        ]
+        for coleccion, nombre, error in errores:
+            logger.error('No se pudo crear el índice %s de %s: %s', nombre, coleccion, error)
+        _indices_listos = not errores
+
+
+def _filtro_vigente(clave):
+    """Entrada persistente todavía vigente (el índice TTL la borra con hasta un minuto de retraso)."""
+    return {'_id': clave, 'fecha': {'$gt': datetime.now(timezone.utc) - timedelta(seconds=Config.CACHE_EVALUACION_TTL)}}
+
+
+def clave_evaluacion(categoria, titulo, descripcion, preguntas):
+    """Hash SHA-256 de las entradas del prompt (y el modelo), usado como clave de la caché."""
+    contenido = json.dumps(
+        [Config.MODELO_EVALUACION, Config.GEMINI_MODELO, categoria, titulo, descripcion, preguntas],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+def _incrementar(contador):
+    with _contadores_lock:
+        contadores_evaluacion[contador] += 1
+
+
+def evaluar_propuesta(categoria, titulo, descripcion, preguntas):
+    """
+    Devuelve la valoración de una propuesta como lista de enteros.
+    Primero busca en la caché en memoria y luego (si está activo) en la caché
+    persistente; solo si no está en ninguna llama al modelo.
+    """
+    clave = clave_evaluacion(categoria, titulo, descripcion, preguntas)
+
+    valoracion = cache_evaluaciones.get(clave)
+    if valoracion is not None:
+        return list(valoracion)
+
+    if Config.CACHE_EVALUACION_PERSISTENTE:
+        guardada = db_evaluaciones.find_one(_filtro_vigente(clave))
+        if guardada:
+            _incrementar('aciertos_persistentes')
+            cache_evaluaciones.set(clave, tuple(guardada['valoracion']))
+            return list(guardada['valoracion'])
+
+    valoracion = llamar_modelo(categoria, titulo, descripcion, preguntas)
+
+    cache_evaluaciones.set(clave, tuple(valoracion))
+    if Config.CACHE_EVALUACION_PERSISTENTE:
+        asegurar_indices()
+        db_evaluaciones.update_one(
+            {'_id': clave},
+            {'$set': {'valoracion': valoracion, 'fecha': datetime.now(timezone.utc)}},
+            upsert=True
+        )
+    return valoracion
+
+
+async def evaluar_propuesta_async(categoria, titulo, descripcion, preguntas):
+    """
+    Versión asíncrona de evaluar_propuesta para los trabajos de app.asincrono:
+    usa las mismas cachés, pero espera al modelo y al nivel persistente sin bloquear el bucle.
+    """
+    clave = clave_evaluacion(categoria, titulo, descripcion, preguntas)
+
+    valoracion = cache_evaluaciones.get(clave)
+    if valoracion is not None:
+        return list(valoracion)
+
+    if Config.CACHE_EVALUACION_PERSISTENTE:
+        guardada = await obtener_db().v_evaluaciones.find_one(_filtro_vigente(clave))
+        if guardada:
+            _incrementar('aciertos_persistentes')
+            cache_evaluaciones.set(clave, tuple(guardada['valoracion']))
+            return list(guardada['valoracion'])
+
+    _incrementar('llamadas_modelo')
+    calificaciones = await obtener_modelo().generar_async(
+        prompt_evaluacion(categoria, titulo, descripcion, preguntas)
+    )
+    valoracion = interpretar_calificaciones(calificaciones, preguntas)
+
+    cache_evaluaciones.set(clave, tuple(valoracion))
+    if Config.CACHE_EVALUACION_PERSISTENTE:
+        await asyncio.to_thread(asegurar_indices)
+        await obtener_db().v_evaluaciones.update_one(
+            {'_id': clave},
+            {'$set': {'valoracion': valoracion, 'fecha': datetime.now(timezone.utc)}},
+            upsert=True
+        )
+    return valoracion
+
+
+def estadisticas_evaluaciones():
+    """Aciertos y fallos de la caché de evaluaciones, incluyendo el nivel persistente."""
+    estadisticas = cache_evaluaciones.estadisticas()
+    with _contadores_lock:
+        estadisticas.update(contadores_evaluacion)
+    estadisticas['persistente'] = Config.CACHE_EVALUACION_PERSISTENTE
+    return estadisticas
+
+
+def llamar_modelo(categoria, titulo, descripcion, preguntas):
+    """
+    Pide al modelo la valoración de una propuesta y la devuelve como lista de enteros.
+    Lanza ValueError si la respuesta del modelo no tiene el formato esperado.
+    """
+    _incrementar('llamadas_modelo')
+
+    # Obtener la respuesta que contiene las calificaciones
+    calificaciones = obtener_modelo().generar(prompt_evaluacion(categoria, titulo, descripcion, preguntas))
+    return interpretar_calificaciones(calificaciones, preguntas)
+
+
+def prompt_evaluacion(categoria, titulo, descripcion, preguntas):
+    """Prompt de evaluación de una propuesta con las preguntas de su categoría."""
+    return PROMPT_EVALUACION.format(
+        categoria=categoria,
+        titulo=titulo,
+        descripcion=descripcion,
+        preguntas=preguntas,
+    )
+
+
+def interpretar_calificaciones(calificaciones, preguntas):
+    """
+    Convierte la respuesta del modelo ("5,4,3") en una lista de enteros.
+    Lanza ValueError si no tiene el formato esperado.
+    """
+    calificaciones = calificaciones.strip()
+    try:
+        valoracion = list(map(int, calificaciones.split(',')))  # Convertir texto a lista de enteros
+    except ValueError:
+        raise ValueError(f'Respuesta inválida del modelo: {calificaciones!r}')
+
+    if len(valoracion) != len(preguntas):
+        raise ValueError(f'Respuesta inválida del modelo: {calificaciones!r}')
+    return valoracion
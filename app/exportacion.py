@@ -0,0 +1,101 @@
+import csv
+import io
+import zlib
+from itertools import islice
+from flask import current_app
+from app import mongo
+from app.json_provider import convertir_bson
+from app.votos import db_votos
+
+# Exportación de votos para auditoría: una fila por voto con los datos de su propuesta.
+# Los votos se leen en orden de _id con un cursor del servidor por lotes (batch_size),
+# y por cada lote se buscan sus propuestas con una sola consulta: la memoria usada
+# depende del tamaño del lote, no del total de votos. Cada fila lleva id_voto, que
+# sirve como punto de control para reanudar la exportación (desde=<id_voto>).
+
+db_propuestas = mongo.db.v_propuestas
+
+CAMPOS_EXPORTACION = ['id_voto', 'id_propuesta', 'titulo', 'categoria', 'id_politico',
+                      'id_votante', 'fecha', 'automatico']
+
+# Formato -> (tipo MIME, extensión). El CSV se entrega comprimido con gzip.
+FORMATOS_EXPORTACION = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('application/gzip', 'csv.gz'),
+}
+
+
+def lotes_votos(batch_size, desde=None):
+    """
+    Genera lotes de filas de exportación (una por voto), en orden de _id,
+    empezando por el voto siguiente a desde (ObjectId) si se indica.
+    """
+    filtro = {'_id': {'$gt': desde}} if desde is not None else {}
+    cursor = db_votos.find(filtro, batch_size=batch_size).sort('_id', 1)
+
+    while True:
+        lote = list(islice(cursor, batch_size))
+        if not lote:
+            return
+
+        propuestas = {
+            p['_id']: p for p in db_propuestas.find(
+                {'_id': {'$in': list({voto['id_propuesta'] for voto in lote})}},
+                {'titulo': 1, 'categoria': 1, 'id_politico': 1}
+            )
+        }
+        filas = []
+        for voto in lote:
+            propuesta = propuestas.get(voto['id_propuesta'], {})
+            filas.append({
+                'id_voto': voto['_id'],
+                'id_propuesta': voto['id_propuesta'],
+                'titulo': propuesta.get('titulo'),
+                'categoria': propuesta.get('categoria'),
+                'id_politico': propuesta.get('id_politico'),
+                'id_votante': voto['id_votante'],
+                'fecha': voto.get('fecha'),
+                'automatico': voto.get('automatico', False),
+            })
+        yield filas
+
+
+def _celda(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, (str, bool, int, float)):
+        return valor
+    return convertir_bson(valor)
+
+
+def exportar_votos(formato, batch_size, desde=None):
+    """
+    Genera (bloque de bytes, id del último voto del bloque) para cada lote de la exportación.
+    Cada bloque está completo por sí mismo: en NDJSON termina en fin de línea y en CSV es
+    un miembro gzip cerrado (varios miembros seguidos forman un gzip válido). Así, un
+    archivo cortado al final de cualquier bloque se puede continuar añadiendo bloques.
+    En CSV el encabezado solo se escribe al empezar (no al reanudar).
+    """
+    if formato == 'ndjson':
+        dumps = current_app.json.dumps
+        for filas in lotes_votos(batch_size, desde):
+            yield ''.join(dumps(fila) + '\n' for fila in filas).encode('utf-8'), filas[-1]['id_voto']
+        return
+
+    encabezado = desde is None
+    for filas in lotes_votos(batch_size, desde):
+        yield _miembro_csv(filas, encabezado), filas[-1]['id_voto']
+        encabezado = False
+    if encabezado:  # Sin votos: solo el encabezado
+        yield _miembro_csv([], True), None
+
+
+def _miembro_csv(filas, encabezado):
+    """Filas en CSV comprimidas como un miembro gzip completo."""
+    texto = io.StringIO()
+    escritor = csv.writer(texto)
+    if encabezado:
+        escritor.writerow(CAMPOS_EXPORTACION)
+    escritor.writerows([_celda(fila[campo]) for campo in CAMPOS_EXPORTACION] for fila in filas)
+    compresor = zlib.compressobj(wbits=31)  # wbits=31: formato gzip
+    return compresor.compress(texto.getvalue().encode('utf-8')) + compresor.flush()
@@ -0,0 +1,122 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class PoolSaturado(Exception):
+    """Se lanza cuando la cola del pool de bcrypt está llena y la petición debe rechazarse."""
+
+
+# Pool acotado para bcrypt. No aumenta los logins por segundo (bcrypt ya libera el GIL,
+# así que en el hilo de la petición también usa todos los núcleos, y el pool agrega un
+# traspaso entre hilos): solo limita cuántos hashes se calculan o esperan a la vez y
+# rechaza el resto con PoolSaturado. Así una ráfaga de logins no acapara la CPU ni los
+# hilos del servidor, y los logins admitidos y las demás peticiones mantienen su
+# latencia a cambio de responder 503 a los que exceden la cola. Se recrea tras un fork.
+_pool = None
+_pool_pid = None
+_cupos = None  # Semáforo: hilos del pool + tareas en espera permitidas
+_pool_lock = threading.Lock()
+
+
+def obtener_pool():
+    """Devuelve (pool, cupos) del proceso actual, creándolos si no existen."""
+    global _pool, _pool_pid, _cupos
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ThreadPoolExecutor(max_workers=Config.BCRYPT_WORKERS, thread_name_prefix='bcrypt')
+            _cupos = threading.BoundedSemaphore(Config.BCRYPT_WORKERS + Config.BCRYPT_COLA_MAXIMA)
+            _pool_pid = os.getpid()
+        return _pool, _cupos
+
+
+def ejecutar_en_pool(funcion, *args):
+    """
+    Envía funcion(*args) al pool y devuelve el Future.
+    Si ya hay demasiadas tareas en espera lanza PoolSaturado de inmediato,
+    en lugar de dejar la petición bloqueada en la cola.
+    """
+    pool, cupos = obtener_pool()
+    if not cupos.acquire(blocking=False):
+        raise PoolSaturado('Demasiadas operaciones de contraseña en curso, intente de nuevo')
+
+    try:
+        future = pool.submit(funcion, *args)
+    except BaseException:
+        cupos.release()  # La tarea no llegó al pool: el callback no liberaría el cupo
+        raise
+    future.add_done_callback(lambda _: cupos.release())
+    return future
+
+
+def _hash(password):
+    salt = bcrypt.gensalt(rounds=Config.BCRYPT_ROUNDS)
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+
+def _check(password, hashed):
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+
+def hash_password(password):
+    """
+    Genera un hash seguro para la contraseña usando bcrypt (en el pool).
+    bcrypt.gensalt() genera una sal aleatoria para proteger contra ataques de rainbow table;
+    el factor de trabajo se toma de Config.BCRYPT_ROUNDS.
+    Devuelve la contraseña hasheada en formato string para que sea compatible con MongoDB.
+    """
+    return ejecutar_en_pool(_hash, password).result()
+
+
+def check_password(password, hashed):
+    """
+    Compara la contraseña en texto plano con el hash almacenado (en el pool).
+    Devuelve True si coinciden, False en caso contrario.
+    """
+    return ejecutar_en_pool(_check, password, hashed).result()
+
+
+def hash_passwords(passwords):
+    """
+    Hashea muchas contraseñas en paralelo (importaciones masivas) y devuelve los
+    hashes en el mismo orden. Usa un pool propio del tamaño de BCRYPT_WORKERS para
+    no ocupar los cupos del pool de las peticiones (que responderían 503).
+    """
+    with ThreadPoolExecutor(max_workers=Config.BCRYPT_WORKERS, thread_name_prefix='bcrypt-lote') as pool:
+        return list(pool.map(_hash, passwords))
+
+
+def costo_hash(hashed):
+    """Devuelve el factor de trabajo de un hash bcrypt ($2b$<costo>$...) o None si no se reconoce."""
+    try:
+        return int(hashed.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def necesita_rehash(hashed):
+    """True si el hash se generó con un factor de trabajo distinto al configurado."""
+    return costo_hash(hashed) != Config.BCRYPT_ROUNDS
+
+
+def programar_rehash(password, guardar):
+    """
+    Recalcula el hash con el factor de trabajo actual en segundo plano y lo entrega
+    a guardar(nuevo_hash). No retrasa la respuesta; si el pool está saturado se
+    omite y se intentará en el siguiente inicio de sesión.
+    """
+    def rehash():
+        try:
+            guardar(_hash(password))
+        except Exception:
+            logger.exception('No se pudo actualizar el hash de la contraseña')
+
+    try:
+        ejecutar_en_pool(rehash)
+    except PoolSaturado:
+        pass
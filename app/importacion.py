@@ -0,0 +1,273 @@
+import csv
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pymongo.errors import BulkWriteError
+from app import mongo
+from app.config import Config
+from app.evaluacion import evaluar_propuesta
+from app.hashing import hash_passwords
+from app.indices import aplicar_indices
+from app.routes.propuestas import generar_votos_automaticos, nueva_propuesta, obtener_preguntas
+from app.schemas import PoliticoSchema, PropuestaSchema, VotanteSchema, cargar_lote, obtener_esquema
+from app.utils import a_object_id
+from app.versiones import incrementar_version
+
+# Importación masiva de votantes, políticos y propuestas desde CSV o NDJSON.
+# El archivo se lee fila por fila y se procesa por lotes: validación con el esquema,
+# contraseñas hasheadas en paralelo e insert_many(ordered=False). Cada fila rechazada
+# queda en v_importacion_errores, y el avance en v_importaciones para poder reanudar.
+# Cada documento insertado lleva id_importacion y fila_importacion (índice único): al
+# reanudar, las filas de un lote que llegó a insertarse antes del corte se reconocen y
+# no se vuelven a insertar.
+
+db_importaciones = mongo.db.v_importaciones
+db_errores = mongo.db.v_importacion_errores
+
+FORMATOS = ('csv', 'ndjson')
+
+
+def _preparar_votantes(validos, errores):
+    """Hashea en paralelo las contraseñas del lote."""
+    con_password = [datos for _, datos in validos if 'password' in datos]
+    for datos, hashed in zip(con_password, hash_passwords([d['password'] for d in con_password])):
+        datos['password'] = hashed
+    return validos
+
+
+def _preparar_politicos(validos, errores):
+    return validos
+
+
+def _preparar_propuestas(validos, errores):
+    """
+    Verifica los políticos del lote con una consulta y valora las propuestas con el
+    modelo en paralelo (usa la caché de evaluaciones). Devuelve los documentos a insertar.
+    """
+    ids_politicos = {a_object_id(datos['id_politico']) for _, datos in validos} - {None}
+    existentes = {p['_id'] for p in mongo.db.v_politicos.find({'_id': {'$in': list(ids_politicos)}}, {'_id': 1})}
+
+    pendientes = []
+    for numero, datos in validos:
+        if a_object_id(datos['id_politico']) not in existentes:
+            errores.append((numero, {'id_politico': ['Político no encontrado']}))
+        else:
+            pendientes.append((numero, datos))
+
+    def valorar(datos):
+        try:
+            return evaluar_propuesta(
+                datos['categoria'], datos['titulo'], datos['descripcion'], obtener_preguntas(datos['categoria'])
+            ), None
+        except Exception as e:
+            return None, str(e)
+
+    with ThreadPoolExecutor(max_workers=Config.TRABAJOS_WORKERS, thread_name_prefix='importacion') as pool:
+        valoraciones = list(pool.map(valorar, [datos for _, datos in pendientes]))
+
+    preparados = []
+    for (numero, datos), (valoracion, error) in zip(pendientes, valoraciones):
+        if error:
+            errores.append((numero, {'valoracion': [error]}))
+        else:
+            preparados.append((numero, nueva_propuesta(datos, valoracion)))
+    return preparados
+
+
+def _votos_propuestas(documentos):
+    """Genera los votos automáticos de las propuestas insertadas."""
+    return sum(generar_votos_automaticos(propuesta) for propuesta in documentos)
+
+
+# tipo -> (esquema, colección, preparación del lote, acción posterior a la inserción)
+TIPOS = {
+    'votantes': (obtener_esquema(VotanteSchema), 'v_votantes', _preparar_votantes, None),
+    'politicos': (obtener_esquema(PoliticoSchema), 'v_politicos', _preparar_politicos, None),
+    'propuestas': (obtener_esquema(PropuestaSchema), 'v_propuestas', _preparar_propuestas, _votos_propuestas),
+}
+
+
+def _valor_csv(valor):
+    """Las celdas con un arreglo u objeto JSON (listas del esquema) se decodifican."""
+    if valor[:1] in ('[', '{'):
+        try:
+            return json.loads(valor)
+        except ValueError:
+            pass
+    return valor
+
+
+def leer_filas(lineas, formato):
+    """
+    Recorre las filas de un archivo CSV (con encabezado) o NDJSON, dado como
+    iterable de líneas de texto. Genera (número de fila, registro, error):
+    registro es None cuando la fila no se pudo interpretar.
+    """
+    if formato == 'csv':
+        for numero, fila in enumerate(csv.DictReader(lineas), 1):
+            if None in fila:
+                yield numero, None, 'La fila tiene más columnas que el encabezado'
+                continue
+            yield numero, {k: _valor_csv(v) for k, v in fila.items() if v not in (None, '')}, None
+    else:
+        for numero, linea in enumerate(lineas, 1):
+            if not linea.strip():
+                continue
+            try:
+                registro = json.loads(linea)
+            except ValueError:
+                yield numero, None, 'JSON inválido'
+                continue
+            if not isinstance(registro, dict):
+                yield numero, None, 'Cada línea debe ser un objeto JSON'
+                continue
+            yield numero, registro, None
+
+
+def _ya_importados(importacion, coleccion, filas):
+    """Documentos de estas filas que ya se insertaron en esta importación: {fila: documento}."""
+    return {
+        documento['fila_importacion']: documento
+        for documento in mongo.db[coleccion].find({
+            'id_importacion': importacion['_id'],
+            'fila_importacion': {'$in': list(filas)},
+        })
+    }
+
+
+def _insertar(importacion, coleccion, preparados, errores):
+    """
+    insert_many sin orden; las filas rechazadas (p. ej. correo duplicado) pasan a errores.
+    Cada documento lleva su importación, su fila y su fecha de creación (para la
+    actualización incremental de recomendaciones).
+    """
+    if not preparados:
+        return []
+    ahora = datetime.now(timezone.utc)
+    for numero, datos in preparados:
+        datos['id_importacion'] = importacion['_id']
+        datos['fila_importacion'] = numero
+        datos['fecha_creacion'] = ahora
+
+    documentos = [datos for _, datos in preparados]
+    fallidos = set()
+    try:
+        mongo.db[coleccion].insert_many(documentos, ordered=False)
+    except BulkWriteError as e:
+        for error in e.details.get('writeErrors', []):
+            fallidos.add(error['index'])
+            mensaje = 'Registro duplicado' if error.get('code') == 11000 else error.get('errmsg')
+            errores.append((preparados[error['index']][0], {'_fila': [mensaje]}))
+    return [documento for i, documento in enumerate(documentos) if i not in fallidos]
+
+
+def _procesar_lote(importacion, lote):
+    """Valida, prepara e inserta un lote de filas y guarda el avance de la importación."""
+    esquema, coleccion, preparar, posterior = TIPOS[importacion['tipo']]
+
+    errores = [(numero, {'_fila': [error]}) for numero, _, error in lote if error]
+    validos, invalidos = cargar_lote(esquema, ((numero, registro) for numero, registro, error in lote if not error))
+    errores.extend(invalidos)
+
+    # Al reanudar, las filas que llegaron a insertarse antes del corte no se repiten;
+    # se completan sus pasos posteriores (los votos automáticos son upserts)
+    existentes = {}
+    if importacion.get('reanudada') and validos:
+        existentes = _ya_importados(importacion, coleccion, (numero for numero, _ in validos))
+        validos = [(numero, datos) for numero, datos in validos if numero not in existentes]
+
+    insertados = list(existentes.values()) + _insertar(importacion, coleccion, preparar(validos, errores), errores)
+    votos_generados = posterior(insertados) if posterior and insertados else 0
+    if insertados:
+        incrementar_version(coleccion)
+
+    if errores:
+        db_errores.insert_many([
+            {'id_importacion': importacion['_id'], 'fila': numero, 'errores': mensajes}
+            for numero, mensajes in sorted(errores, key=lambda e: e[0])
+        ])
+
+    db_importaciones.update_one({'_id': importacion['_id']}, {
+        '$set': {'filas_procesadas': lote[-1][0], 'fecha_actualizacion': datetime.now(timezone.utc)},
+        '$inc': {'insertados': len(insertados), 'errores': len(errores), 'votos_generados': votos_generados},
+    })
+
+
+def iniciar_importacion(tipo, formato, id_reanudar=None):
+    """
+    Crea el registro de una importación nueva, o retoma el de id_reanudar.
+    Al reanudar se descartan los errores de filas posteriores al último lote guardado,
+    porque esas filas se vuelven a procesar.
+    Lanza ValueError si los parámetros no son válidos.
+    """
+    if tipo not in TIPOS:
+        raise ValueError(f'Tipo de importación desconocido: {tipo}. Use {", ".join(TIPOS)}')
+    if formato not in FORMATOS:
+        raise ValueError(f'Formato desconocido: {formato}. Use csv o ndjson')
+
+    ahora = datetime.now(timezone.utc)
+    if id_reanudar is None:
+        importacion = {
+            'tipo': tipo,
+            'formato': formato,
+            'estado': 'en_proceso',
+            'filas_procesadas': 0,
+            'insertados': 0,
+            'errores': 0,
+            'votos_generados': 0,
+            'fecha_creacion': ahora,
+            'fecha_actualizacion': ahora,
+        }
+        importacion['_id'] = db_importaciones.insert_one(importacion).inserted_id
+        return importacion
+
+    importacion = db_importaciones.find_one({'_id': a_object_id(id_reanudar)})
+    if not importacion:
+        raise ValueError('Importación no encontrada')
+    if importacion['tipo'] != tipo:
+        raise ValueError(f'La importación a reanudar es de {importacion["tipo"]}')
+
+    eliminados = db_errores.delete_many({
+        'id_importacion': importacion['_id'], 'fila': {'$gt': importacion['filas_procesadas']}
+    }).deleted_count
+    db_importaciones.update_one({'_id': importacion['_id']}, {
+        '$set': {'estado': 'en_proceso', 'fecha_actualizacion': ahora},
+        '$inc': {'errores': -eliminados},
+        '$unset': {'error': ''},
+    })
+    importacion['reanudada'] = True  # Solo en memoria: activa la detección de filas ya insertadas
+    return importacion
+
+
+def importar(importacion, lineas, batch_size=None):
+    """
+    Importa las filas de lineas (iterable de líneas de texto) por lotes de batch_size
+    (Config.IMPORTACION_LOTE por defecto), saltando las ya procesadas si se reanuda.
+    Devuelve el registro final de la importación.
+    """
+    batch_size = batch_size or Config.IMPORTACION_LOTE
+    _, coleccion, _, _ = TIPOS[importacion['tipo']]
+    aplicar_indices([coleccion])  # El índice único de correo detecta los duplicados
+
+    desde = importacion['filas_procesadas']
+    lote = []
+    try:
+        for fila in leer_filas(lineas, importacion['formato']):
+            if fila[0] <= desde:
+                continue
+            lote.append(fila)
+            if len(lote) >= batch_size:
+                _procesar_lote(importacion, lote)
+                lote = []
+        if lote:
+            _procesar_lote(importacion, lote)
+    except Exception as e:
+        db_importaciones.update_one({'_id': importacion['_id']}, {'$set': {
+            'estado': 'fallida', 'error': str(e), 'fecha_actualizacion': datetime.now(timezone.utc)
+        }})
+        raise
+
+    db_importaciones.update_one({'_id': importacion['_id']}, {'$set': {
+        'estado': 'completada', 'fecha_actualizacion': datetime.now(timezone.utc)
+    }})
+    return db_importaciones.find_one({'_id': importacion['_id']})
@@ -0,0 +1,164 @@
+from datetime import datetime
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import PyMongoError
+from app import mongo
+from app.config import Config
+
+# Índices declarados por colección. aplicar_indices() los crea si no existen
+# (create_index es idempotente), así que se puede ejecutar en cada arranque.
+INDICES = {
+    'v_votantes': [
+        {'keys': [('correo', ASCENDING)], 'name': 'correo_unico', 'unique': True},
+        # Búsqueda de votantes por (categoría, valoración) para los votos automáticos
+        *[
+            {'keys': [(f'valoracion.{cat_id}', ASCENDING)], 'name': f'valoracion_{cat_id}'}
+            for cat_id in range(1, 11)
+        ],
+        # Votantes creados o editados desde la última actualización del índice de recomendaciones
+        {'keys': [('fecha_creacion', ASCENDING)], 'name': 'fecha_creacion', 'sparse': True},
+        {'keys': [('fecha_actualizacion', ASCENDING)], 'name': 'fecha_actualizacion', 'sparse': True},
+        # Filas ya insertadas por una importación (para reanudarla sin duplicar)
+        {'keys': [('id_importacion', ASCENDING), ('fila_importacion', ASCENDING)], 'name': 'importacion_fila_unico',
+         'unique': True, 'partialFilterExpression': {'id_importacion': {'$exists': True}}},
+    ],
+    'v_politicos': [
+        {'keys': [('correo', ASCENDING)], 'name': 'correo_unico', 'unique': True},
+        # Filas ya insertadas por una importación (para reanudarla sin duplicar)
+        {'keys': [('id_importacion', ASCENDING), ('fila_importacion', ASCENDING)], 'name': 'importacion_fila_unico',
+         'unique': True, 'partialFilterExpression': {'id_importacion': {'$exists': True}}},
+    ],
+    'v_administradores': [
+        {'keys': [('correo', ASCENDING)], 'name': 'correo_unico', 'unique': True},
+    ],
+    'v_propuestas': [
+        {'keys': [('id_politico', ASCENDING)], 'name': 'politico'},
+        {'keys': [('total_votos', DESCENDING)], 'name': 'ranking'},
+        {'keys': [('categoria', ASCENDING), ('total_votos', DESCENDING)], 'name': 'ranking_categoria'},
+        {'keys': [('fecha_creacion', ASCENDING)], 'name': 'fecha_creacion', 'sparse': True},
+        {'keys': [('fecha_actualizacion', ASCENDING)], 'name': 'fecha_actualizacion', 'sparse': True},
+        # Propuestas por (categoría, valoración) para volver a emparejar a un votante
+        {'keys': [('categoria', ASCENDING), ('valoracion', ASCENDING)], 'name': 'categoria_valoracion'},
+        # Filas ya insertadas por una importación (para reanudarla sin duplicar)
+        {'keys': [('id_importacion', ASCENDING), ('fila_importacion', ASCENDING)], 'name': 'importacion_fila_unico',
+         'unique': True, 'partialFilterExpression': {'id_importacion': {'$exists': True}}},
+    ],
+    'v_votos': [
+        {'keys': [('id_propuesta', ASCENDING), ('id_votante', ASCENDING)],
+         'name': 'propuesta_votante_unico', 'unique': True},
+        {'keys': [('id_propuesta', ASCENDING), ('_id', ASCENDING)], 'name': 'propuesta_paginacion'},
+        {'keys': [('id_votante', ASCENDING)], 'name': 'votante'},
+    ],
+    'v_trabajos': [
+        # Trabajos pendientes o en proceso sin avance (abandonados)
+        {'keys': [('estado', ASCENDING), ('fecha_actualizacion', ASCENDING)], 'name': 'estado_fecha'},
+    ],
+    'v_evaluaciones': [
+        # Nivel persistente de la caché de evaluaciones: MongoDB borra cada entrada
+        # CACHE_EVALUACION_TTL segundos después de guardarla
+        {'keys': [('fecha', ASCENDING)], 'name': 'fecha_ttl', 'expireAfterSeconds': Config.CACHE_EVALUACION_TTL},
+    ],
+    'v_votos_rechazados': [
+        # Un documento por voto embebido rechazado en la migración (upsert idempotente)
+        {'keys': [('id_propuesta', ASCENDING), ('indice', ASCENDING)], 'name': 'propuesta_indice_unico', 'unique': True},
+    ],
+    'v_tokens_revocados': [
+        # MongoDB borra cada revocación cuando el token ya expiró
+        {'keys': [('expira', ASCENDING)], 'name': 'expira_ttl', 'expireAfterSeconds': 0},
+    ],
+    'v_conteos': [
+        {'keys': [('tipo', ASCENDING), ('clave', ASCENDING)], 'name': 'tipo_clave_unico', 'unique': True},
+        {'keys': [('tipo', ASCENDING), ('total_votos', DESCENDING)], 'name': 'ranking'},
+    ],
+    'v_importacion_errores': [
+        {'keys': [('id_importacion', ASCENDING), ('_id', ASCENDING)], 'name': 'importacion_paginacion'},
+        {'keys': [('id_importacion', ASCENDING), ('fila', ASCENDING)], 'name': 'importacion_fila'},
+    ],
+}
+
+
+def aplicar_indices(colecciones=None):
+    """
+    Crea los índices declarados en INDICES (todas las colecciones o solo las indicadas).
+    Un índice que no se pueda crear (por ejemplo, unique con correos duplicados)
+    no detiene a los demás.
+    Devuelve una lista de (colección, índice, error o None).
+    """
+    resultados = []
+    for coleccion, indices in INDICES.items():
+        if colecciones is not None and coleccion not in colecciones:
+            continue
+        for indice in indices:
+            opciones = {k: v for k, v in indice.items() if k != 'keys'}
+            try:
+                mongo.db[coleccion].create_index(indice['keys'], **opciones)
+                resultados.append((coleccion, indice['name'], None))
+            except PyMongoError as e:
+                resultados.append((coleccion, indice['name'], str(e)))
+    return resultados
+
+
+# Forma de las consultas que hace cada ruta, con valores de ejemplo, para auditar
+# su plan de ejecución con explain(). (ruta, colección, filtro, orden)
+_ID = ObjectId()
+CONSULTAS = [
+    ('GET /api/votante/<id>', 'v_votantes', {'_id': _ID}, None),
+    ('GET /api/votante/correo/<correo>', 'v_votantes', {'correo': 'auditoria@ejemplo.com'}, None),
+    ('POST /api/votante/login', 'v_votantes', {'correo': 'auditoria@ejemplo.com'}, None),
+    ('GET /api/votante (paginado)', 'v_votantes', {'_id': {'$gt': _ID}}, [('_id', 1)]),
+    ('votos automáticos', 'v_votantes', {'valoracion.1': [5, 4, 3]}, None),
+    ('GET /api/politico/<id>', 'v_politicos', {'_id': _ID}, None),
+    ('GET /api/politico/correo/<correo>', 'v_politicos', {'correo': 'auditoria@ejemplo.com'}, None),
+    ('GET /api/politico (paginado)', 'v_politicos', {'_id': {'$gt': _ID}}, [('_id', 1)]),
+    ('GET /api/propuesta (políticos)', 'v_politicos', {'_id': {'$in': [_ID]}}, None),
+    ('GET /api/administrador/<id>', 'v_administradores', {'_id': _ID}, None),
+    ('GET /api/administrador/correo/<correo>', 'v_administradores', {'correo': 'auditoria@ejemplo.com'}, None),
+    ('GET /api/administrador (paginado)', 'v_administradores', {'_id': {'$gt': _ID}}, [('_id', 1)]),
+    ('GET /api/propuesta/<id>', 'v_propuestas', {'_id': _ID}, None),
+    ('GET /api/propuesta (paginado)', 'v_propuestas', {'_id': {'$gt': _ID}}, [('_id', 1)]),
+    ('GET /api/propuesta/ultimas', 'v_propuestas', {}, [('_id', -1)]),
+    ('GET /api/propuesta/politico/<id>', 'v_propuestas', {'id_politico': {'$in': [str(_ID), _ID]}}, None),
+    ('GET /api/estadisticas/ranking/propuestas', 'v_propuestas', {}, [('total_votos', -1)]),
+    ('GET /api/estadisticas/ranking/propuestas?categoria', 'v_propuestas', {'categoria': 'Salud'}, [('total_votos', -1)]),
+    ('POST /api/propuesta/vote', 'v_votos', {'id_propuesta': _ID, 'id_votante': _ID}, None),
+    ('GET /api/propuesta/<id>/votos', 'v_votos', {'id_propuesta': _ID, '_id': {'$gt': _ID}}, [('_id', 1)]),
+    ('votos de un votante', 'v_votos', {'id_votante': _ID}, None),
+    ('emparejar votante (propuestas coincidentes)', 'v_propuestas',
+     {'$or': [{'categoria': 'Salud', 'valoracion': [5, 4, 3]}]}, None),
+    ('recomendaciones (votantes nuevos o editados)', 'v_votantes',
+     {'$or': [{'fecha_creacion': {'$gte': datetime(2024, 1, 1)}}, {'fecha_actualizacion': {'$gte': datetime(2024, 1, 1)}}]}, None),
+    ('recomendaciones (propuestas nuevas o editadas)', 'v_propuestas',
+     {'$or': [{'fecha_creacion': {'$gte': datetime(2024, 1, 1)}}, {'fecha_actualizacion': {'$gte': datetime(2024, 1, 1)}}]}, None),
+    ('GET /api/estadisticas/ranking/politicos', 'v_conteos', {'tipo': 'politico'}, [('total_votos', -1)]),
+    ('conteos ($inc)', 'v_conteos', {'tipo': 'categoria', 'clave': 'Salud'}, None),
+    ('GET /api/importar/<id>/errores', 'v_importacion_errores',
+     {'id_importacion': _ID, '_id': {'$gt': _ID}}, [('_id', 1)]),
+]
+
+
+def _etapas(plan):
+    """Devuelve todas las etapas (stage) de un plan de ejecución, recorriéndolo completo."""
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            yield plan['stage']
+        for valor in plan.values():
+            yield from _etapas(valor)
+    elif isinstance(plan, list):
+        for valor in plan:
+            yield from _etapas(valor)
+
+
+def auditar_consultas():
+    """
+    Ejecuta explain() sobre la forma de consulta de cada ruta.
+    Devuelve una lista de (ruta, colección, etapas del plan, usa_collscan).
+    """
+    resultados = []
+    for ruta, coleccion, filtro, orden in CONSULTAS:
+        cursor = mongo.db[coleccion].find(filtro)
+        if orden:
+            cursor = cursor.sort(orden)
+        plan = cursor.explain().get('queryPlanner', {}).get('winningPlan', {})
+        etapas = list(_etapas(plan))
+        resultados.append((ruta, coleccion, etapas, 'COLLSCAN' in etapas))
+    return resultados
@@ -0,0 +1,66 @@
+import json
+from datetime import date, datetime, timezone
+from bson import ObjectId, Decimal128
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # Sin orjson se usa el módulo json estándar
+    orjson = None
+
+
+def convertir_bson(obj):
+    """
+    Convierte los tipos de MongoDB que JSON no soporta:
+    ObjectId -> string, datetime -> ISO 8601 (las fechas sin zona se toman como UTC),
+    Decimal128 -> string.
+    """
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, datetime):
+        if obj.tzinfo is None:
+            obj = obj.replace(tzinfo=timezone.utc)
+        return obj.isoformat()
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if isinstance(obj, Decimal128):
+        return str(obj)
+    raise TypeError(f'Objeto de tipo {type(obj).__name__} no serializable a JSON')
+
+
+class BSONJSONProvider(JSONProvider):
+    """
+    Proveedor JSON de la app para documentos de MongoDB.
+    Serializa ObjectId y datetime directamente (también anidados, por ejemplo
+    id_politico o id_votante), así las rutas pueden devolver los documentos tal
+    como salen de la BD. Usa orjson si está instalado.
+    """
+
+    mimetype = 'application/json'
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None:
+            return self._dumps_bytes(obj).decode('utf-8')
+        kwargs.setdefault('default', convertir_bson)
+        kwargs.setdefault('ensure_ascii', False)
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def _dumps_bytes(self, obj, indent=False):
+        opciones = orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+        if indent:
+            opciones |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=convertir_bson, option=opciones)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if orjson is None:
+            return self._app.response_class(self.dumps(obj) + '\n', mimetype=self.mimetype)
+
+        # Con orjson se escriben los bytes directamente, sin pasar por str
+        cuerpo = self._dumps_bytes(obj, indent=self._app.debug) + b'\n'
+        return self._app.response_class(cuerpo, mimetype=self.mimetype)
@@ -0,0 +1,178 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from flask import request
+from pymongo import monitoring
+
+# Métricas del proceso en formato de texto de Prometheus:
+# - duración de cada petición por método, ruta y código de estado
+# - consultas a MongoDB por petición, por ruta
+# - duración de cada comando de MongoDB, por ruta y comando
+# Cada proceso (worker de gunicorn) lleva sus propias métricas, y todas las series
+# llevan la etiqueta pid: Prometheus las guarda por separado aunque cada scrape llegue
+# a un worker distinto, y se suman con sum without (pid) (...) en las consultas.
+
+BUCKETS_DURACION = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000)
+
+# Ruta de la petición en curso en cada hilo, para atribuirle los comandos de MongoDB
+_peticion = threading.local()
+
+# Etiqueta de los comandos que no ocurren dentro de una petición (trabajos en segundo plano)
+FUERA_DE_PETICION = 'segundo_plano'
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _formatear_limite(limite):
+    return repr(float(limite)) if limite != float('inf') else '+Inf'
+
+
+class Histograma:
+    """Histograma de Prometheus con etiquetas, seguro entre hilos."""
+
+    def __init__(self, nombre, descripcion, etiquetas, buckets):
+        self.nombre = nombre
+        self.descripcion = descripcion
+        self.etiquetas = etiquetas
+        self.buckets = tuple(buckets) + (float('inf'),)
+        self._series = {}  # valores de las etiquetas -> [conteo por bucket, suma, total]
+        self._lock = threading.Lock()
+
+    def observar(self, valor, *valores_etiquetas):
+        indice = bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(valores_etiquetas)
+            if serie is None:
+                serie = self._series[valores_etiquetas] = [[0] * len(self.buckets), 0.0, 0]
+            serie[0][indice] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def exportar(self, fijas=()):
+        """Líneas en formato de texto; fijas son pares (etiqueta, valor) comunes a todas las series."""
+        lineas = [f'# HELP {self.nombre} {self.descripcion}', f'# TYPE {self.nombre} histogram']
+        with self._lock:
+            series = [(clave, list(conteos), suma, total) for clave, (conteos, suma, total) in self._series.items()]
+
+        for valores, conteos, suma, total in sorted(series):
+            etiquetas = ','.join(
+                f'{e}="{_escapar(v)}"' for e, v in list(fijas) + list(zip(self.etiquetas, valores))
+            )
+            acumulado = 0
+            for limite, conteo in zip(self.buckets, conteos):
+                acumulado += conteo
+                separador = ',' if etiquetas else ''
+                lineas.append(f'{self.nombre}_bucket{{{etiquetas}{separador}le="{_formatear_limite(limite)}"}} {acumulado}')
+            lineas.append(f'{self.nombre}_sum{{{etiquetas}}} {suma}')
+            lineas.append(f'{self.nombre}_count{{{etiquetas}}} {total}')
+        return lineas
+
+
+duracion_peticiones = Histograma(
+    'autovote_peticion_duracion_seconds',
+    'Duración de las peticiones HTTP.',
+    ('metodo', 'ruta', 'estado'),
+    BUCKETS_DURACION
+)
+consultas_peticiones = Histograma(
+    'autovote_peticion_consultas_mongo',
+    'Comandos de MongoDB enviados por petición.',
+    ('metodo', 'ruta'),
+    BUCKETS_CONSULTAS
+)
+duracion_comandos = Histograma(
+    'autovote_mongo_comando_duracion_seconds',
+    'Duración de los comandos de MongoDB, por la ruta que los envió.',
+    ('ruta', 'comando'),
+    BUCKETS_DURACION
+)
+
+HISTOGRAMAS = [duracion_peticiones, consultas_peticiones, duracion_comandos]
+
+
+class EscuchaComandos(monitoring.CommandListener):
+    """
+    Atribuye cada comando de MongoDB a la petición en curso en el hilo que lo envía
+    (el driver síncrono notifica en el mismo hilo que ejecuta la consulta).
+    """
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._registrar(event)
+
+    def failed(self, event):
+        self._registrar(event)
+
+    def _registrar(self, event):
+        ruta = getattr(_peticion, 'ruta', None)
+        if ruta is None:
+            ruta = FUERA_DE_PETICION
+        else:
+            _peticion.consultas += 1
+        duracion_comandos.observar(event.duration_micros / 1e6, ruta, event.command_name)
+
+
+# Se pasa al MongoClient en create_app (event_listeners)
+escucha_comandos = EscuchaComandos()
+
+
+def _observar(metodo, ruta, estado):
+    duracion_peticiones.observar(time.perf_counter() - _peticion.inicio, metodo, ruta, estado)
+    consultas_peticiones.observar(_peticion.consultas, metodo, ruta)
+
+
+def registrar_metricas(app):
+    """
+    Registra en la app la medición de la duración y las consultas de cada petición.
+    Las respuestas en streaming se miden al cerrarse (cuando el servidor terminó de
+    enviarlas), porque sus consultas ocurren mientras se genera el cuerpo, en el mismo hilo.
+    """
+
+    @app.before_request
+    def iniciar_medicion():
+        _peticion.ruta = request.url_rule.rule if request.url_rule else 'sin_ruta'
+        _peticion.consultas = 0
+        _peticion.inicio = time.perf_counter()
+        _peticion.en_stream = False
+
+    @app.after_request
+    def registrar_medicion(response):
+        ruta = getattr(_peticion, 'ruta', None)
+        if ruta is None:
+            return response
+        if not response.is_streamed:
+            _observar(request.method, ruta, response.status_code)
+            return response
+
+        metodo, estado = request.method, response.status_code
+        _peticion.en_stream = True
+
+        def terminar_stream():
+            _observar(metodo, ruta, estado)
+            _peticion.ruta = None
+            _peticion.en_stream = False
+
+        response.call_on_close(terminar_stream)
+        return response
+
+    @app.teardown_request
+    def terminar_medicion(exc):
+        # Los comandos posteriores en este hilo ya no pertenecen a la petición
+        # (salvo los de una respuesta en streaming, que se cierra después)
+        if not getattr(_peticion, 'en_stream', False):
+            _peticion.ruta = None
+
+
+def exportar_metricas():
+    """Todas las métricas del proceso en formato de texto de Prometheus."""
+    lineas = []
+    fijas = [('pid', os.getpid())]
+    for histograma in HISTOGRAMAS:
+        lineas.extend(histograma.exportar(fijas))
+    return '\n'.join(lineas) + '\n'
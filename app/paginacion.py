@@ -0,0 +1,75 @@
+from collections import namedtuple
+from flask import request, jsonify
+from bson import ObjectId
+from app.config import Config
+
+# Resultado de una consulta paginada:
+# - documentos: lista de documentos de la página
+# - siguiente: cursor (_id en string) para pedir la siguiente página, o None si no hay más
+# - completa: True cuando se pidió el volcado completo (?todos=true)
+Pagina = namedtuple('Pagina', ['documentos', 'siguiente', 'completa'])
+
+VALORES_VERDADEROS = ('1', 'true', 'si', 'sí')
+
+
+def leer_parametros_paginacion():
+    """
+    Lee los parámetros limit, after y todos de la query string.
+    Lanza ValueError si alguno no es válido.
+    """
+    todos = request.args.get('todos', '').lower() in VALORES_VERDADEROS
+
+    try:
+        limite = int(request.args.get('limit', Config.PAGINACION_LIMITE_DEFECTO))
+    except ValueError:
+        raise ValueError('El parámetro limit debe ser un número entero')
+    if limite < 1:
+        raise ValueError('El parámetro limit debe ser mayor que 0')
+    limite = min(limite, Config.PAGINACION_LIMITE_MAXIMO)
+
+    despues = request.args.get('after')
+    if despues is not None:
+        if not ObjectId.is_valid(despues):
+            raise ValueError('El parámetro after no es un cursor válido')
+        despues = ObjectId(despues)
+
+    return limite, despues, todos
+
+
+def paginar(coleccion, filtro=None):
+    """
+    Pagina una colección por _id (keyset): cada página empieza justo después del
+    cursor recibido, por lo que el costo no crece con el número de página.
+    Con ?todos=true devuelve la colección completa (comportamiento anterior).
+    """
+    filtro = dict(filtro or {})
+    limite, despues, todos = leer_parametros_paginacion()
+
+    if todos:
+        return Pagina(list(coleccion.find(filtro)), None, True)
+
+    if despues is not None:
+        filtro['_id'] = {'$gt': despues}
+
+    # Se pide un documento extra para saber si existe una página siguiente
+    documentos = list(coleccion.find(filtro).sort('_id', 1).limit(limite + 1))
+    siguiente = None
+    if len(documentos) > limite:
+        documentos = documentos[:limite]
+        siguiente = str(documentos[-1]['_id'])
+
+    return Pagina(documentos, siguiente, False)
+
+
+def respuesta_paginada(pagina):
+    """
+    Construye la respuesta JSON de una página.
+    El volcado completo conserva el formato anterior (una lista simple).
+    """
+    if pagina.completa:
+        return jsonify(pagina.documentos)
+
+    return jsonify({
+        'datos': pagina.documentos,
+        'siguiente': pagina.siguiente
+    })
@@ -0,0 +1,334 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from app import mongo
+from app.config import Config
+from app.routes.propuestas import CATEGORIA_MAP
+from app.versiones import obtener_version
+
+try:
+    import numpy as np
+except ImportError:  # Sin numpy no hay recomendaciones (la ruta responde 503)
+    np = None
+
+# Recomendación de propuestas por similitud de valoraciones.
+# Cada proceso guarda las valoraciones de todos los votantes (votantes x categorías x 3)
+# y de todas las propuestas (propuestas x 3, con su categoría) en matrices de numpy.
+# La similitud entre un votante y una propuesta es 1 / (1 + distancia euclídea) entre la
+# valoración de la propuesta y la del votante en la misma categoría: 1 es coincidencia
+# exacta (lo que hoy genera un voto automático) y decrece al alejarse.
+#
+# Un hilo del proceso carga las matrices completas la primera vez que se piden (mientras
+# tanto las recomendaciones responden 503) y después las actualiza cada
+# RECOMENDACIONES_INTERVALO segundos solo con los documentos creados (fecha_creacion) o
+# editados (fecha_actualizacion) por la API desde la última actualización. Se usan las
+# fechas y no el _id porque los ObjectId de procesos distintos no son crecientes entre sí.
+# Cada RECOMENDACIONES_RECARGA segundos se recargan completas para reflejar borrados y
+# cambios hechos fuera de la API.
+
+logger = logging.getLogger(__name__)
+
+db_votantes = mongo.db.v_votantes
+db_propuestas = mongo.db.v_propuestas
+db_votos = mongo.db.v_votos
+
+N_CATEGORIAS = len(CATEGORIA_MAP)
+N_RESPUESTAS = 3
+
+# Margen para las escrituras de otros procesos cuyo reloj va un poco atrasado
+MARGEN_ACTUALIZACION = timedelta(seconds=5)
+
+
+class IndiceNoListo(RuntimeError):
+    """El índice del proceso todavía se está cargando."""
+
+
+def _respuestas(valor):
+    """Las 3 respuestas de una valoración como números, o None si no es válida."""
+    if not isinstance(valor, (list, tuple)) or len(valor) != N_RESPUESTAS:
+        return None
+    if not all(isinstance(r, (int, float)) and not isinstance(r, bool) for r in valor):
+        return None
+    return valor
+
+
+def vector_votante(votante):
+    """Valoración del votante como matriz categorías x 3 (NaN en las categorías sin responder)."""
+    vector = np.full((N_CATEGORIAS, N_RESPUESTAS), np.nan, dtype=np.float32)
+    valoracion = votante.get('valoracion')
+    if isinstance(valoracion, dict):
+        for cat_id, valor in valoracion.items():
+            respuestas = _respuestas(valor)
+            if respuestas is not None and str(cat_id).isdigit() and 1 <= int(cat_id) <= N_CATEGORIAS:
+                vector[int(cat_id) - 1] = respuestas
+    return vector
+
+
+def vector_propuesta(propuesta):
+    """(índice de categoría, valoración) de la propuesta; categoría -1 si no se puede comparar."""
+    respuestas = _respuestas(propuesta.get('valoracion'))
+    cat_id = CATEGORIA_MAP.get(propuesta.get('categoria'))
+    if respuestas is None or cat_id is None:
+        return -1, np.full(N_RESPUESTAS, np.nan, dtype=np.float32)
+    return cat_id - 1, np.asarray(respuestas, dtype=np.float32)
+
+
+class _Filas:
+    """Ids de documentos y su fila en una matriz que crece por duplicación."""
+
+    def __init__(self, forma, relleno):
+        self.ids = []
+        self.fila = {}
+        self.forma = forma
+        self.relleno = relleno
+        self.datos = np.full((16,) + forma, relleno, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def asignar(self, _id, valor):
+        """Escribe la fila del documento (la agrega al final si es nuevo) y devuelve su índice."""
+        fila = self.fila.get(_id)
+        if fila is None:
+            fila = len(self.ids)
+            if fila == len(self.datos):
+                ampliada = np.full((2 * fila,) + self.forma, self.relleno, dtype=np.float32)
+                ampliada[:fila] = self.datos
+                self.datos = ampliada
+            self.ids.append(_id)
+            self.fila[_id] = fila
+        self.datos[fila] = valor
+        return fila
+
+    def vista(self):
+        return self.datos[:len(self.ids)]
+
+
+class IndiceRecomendaciones:
+    """Matrices de valoraciones de votantes y propuestas de un proceso."""
+
+    def __init__(self):
+        self.votantes = _Filas((N_CATEGORIAS, N_RESPUESTAS), np.nan)
+        self.propuestas = _Filas((N_RESPUESTAS,), np.nan)
+        self.categorias = _Filas((), -1)  # Misma fila que propuestas
+        self.lock = threading.Lock()
+        self.marca = None  # Inicio de la última actualización (fecha UTC)
+        self.recargado = 0.0  # Momento de la última carga completa (time.monotonic)
+        self.versiones = None  # Versiones de v_votantes y v_propuestas ya reflejadas
+
+    @classmethod
+    def desde_documentos(cls, votantes, propuestas):
+        """Índice construido con los documentos indicados (sin consultar la BD)."""
+        indice = cls()
+        indice.agregar(votantes, propuestas)
+        return indice
+
+    def agregar(self, votantes, propuestas):
+        """Agrega o reemplaza las valoraciones de los documentos indicados."""
+        for votante in votantes:
+            vector = vector_votante(votante)
+            with self.lock:
+                self.votantes.asignar(votante['_id'], vector)
+        for propuesta in propuestas:
+            categoria, vector = vector_propuesta(propuesta)
+            with self.lock:
+                self.propuestas.asignar(propuesta['_id'], vector)
+                self.categorias.asignar(propuesta['_id'], categoria)
+
+    def recomendar(self, id_votante, k, excluir=()):
+        """
+        Las k propuestas más similares al votante, como [(id_propuesta, similitud)] de mayor
+        a menor, sin las de excluir ni las de categorías que el votante no respondió.
+        Devuelve None si el votante no está en el índice.
+        """
+        with self.lock:
+            fila = self.votantes.fila.get(id_votante)
+            if fila is None:
+                return None
+            votante = self.votantes.datos[fila]
+            propuestas = self.propuestas.vista()
+            categorias = self.categorias.vista().astype(np.intp)
+            ids = self.propuestas.ids
+
+            comparables = categorias >= 0
+            # Valoración del votante en la categoría de cada propuesta
+            objetivo = votante[np.where(comparables, categorias, 0)]
+            distancia = np.sqrt(((propuestas - objetivo) ** 2).sum(axis=1))
+            similitud = 1 / (1 + distancia)
+            similitud[~comparables | np.isnan(similitud)] = -np.inf
+            for _id in excluir:
+                excluida = self.propuestas.fila.get(_id)
+                if excluida is not None:
+                    similitud[excluida] = -np.inf
+
+            candidatas = min(k, int(np.isfinite(similitud).sum()))
+            if candidatas == 0:
+                return []
+            mejores = np.argpartition(-similitud, candidatas - 1)[:candidatas]
+            mejores = mejores[np.argsort(-similitud[mejores], kind='stable')]
+            return [(ids[i], float(similitud[i])) for i in mejores]
+
+    def recomendar_todos(self, k, bloque=None):
+        """
+        Genera (id_votante, [(id_propuesta, similitud)]) con las k mejores propuestas de
+        cada votante, procesando bloques de votantes x propuestas con productos de matrices
+        (la memoria depende del tamaño del bloque, no del número de votantes).
+        No descarta las propuestas que el votante ya votó.
+        """
+        bloque = bloque or Config.RECOMENDACIONES_BLOQUE
+        with self.lock:
+            votantes = self.votantes.vista().copy()
+            propuestas = self.propuestas.vista().copy()
+            categorias = self.categorias.vista().astype(np.intp)
+            ids_votantes = list(self.votantes.ids)
+            ids_propuestas = list(self.propuestas.ids)
+
+        por_categoria = [np.flatnonzero(categorias == c) for c in range(N_CATEGORIAS)]
+        for inicio in range(0, len(votantes), bloque):
+            grupo = votantes[inicio:inicio + bloque]
+            mejores = np.full((len(grupo), k), -np.inf, dtype=np.float32)
+            filas_mejores = np.full((len(grupo), k), -1, dtype=np.intp)
+
+            for categoria, filas in enumerate(por_categoria):
+                a = grupo[:, categoria, :]
+                normas_a = (a * a).sum(axis=1)[:, None]
+                for desde in range(0, len(filas), bloque):
+                    columnas = filas[desde:desde + bloque]
+                    b = propuestas[columnas]
+                    # ||a - b||² = ||a||² + ||b||² - 2 a·b, para todo el bloque de una vez
+                    cuadrados = normas_a + (b * b).sum(axis=1)[None, :] - 2 * (a @ b.T)
+                    similitud = 1 / (1 + np.sqrt(np.maximum(cuadrados, 0)))
+                    similitud[np.isnan(similitud)] = -np.inf
+
+                    todas = np.concatenate([mejores, similitud], axis=1)
+                    todas_filas = np.concatenate(
+                        [filas_mejores, np.broadcast_to(columnas, similitud.shape)], axis=1
+                    )
+                    seleccion = np.argpartition(-todas, k - 1, axis=1)[:, :k]
+                    mejores = np.take_along_axis(todas, seleccion, axis=1)
+                    filas_mejores = np.take_along_axis(todas_filas, seleccion, axis=1)
+
+            orden = np.argsort(-mejores, axis=1, kind='stable')
+            mejores = np.take_along_axis(mejores, orden, axis=1)
+            filas_mejores = np.take_along_axis(filas_mejores, orden, axis=1)
+            for i, (similitudes, filas) in enumerate(zip(mejores, filas_mejores)):
+                yield ids_votantes[inicio + i], [
+                    (ids_propuestas[fila], float(similitud))
+                    for similitud, fila in zip(similitudes, filas) if similitud > -np.inf
+                ]
+
+
+# ----------------------------------------
+# Índice del proceso y actualización periódica
+# ----------------------------------------
+
+_indice = None
+_indice_pid = None
+_indice_listo = threading.Event()
+_indice_lock = threading.Lock()
+
+PROYECCION_VOTANTES = {'valoracion': 1}
+PROYECCION_PROPUESTAS = {'valoracion': 1, 'categoria': 1}
+
+
+def _versiones_actuales():
+    return obtener_version('v_votantes'), obtener_version('v_propuestas')
+
+
+def cargar_indice():
+    """Índice nuevo con todos los votantes y propuestas de la BD."""
+    indice = IndiceRecomendaciones()
+    indice.marca = datetime.now(timezone.utc)
+    indice.versiones = _versiones_actuales()
+    indice.agregar(db_votantes.find({}, PROYECCION_VOTANTES), db_propuestas.find({}, PROYECCION_PROPUESTAS))
+    indice.recargado = time.monotonic()
+    return indice
+
+
+def _filtro_cambios(indice):
+    """Documentos creados o editados por la API desde la última actualización."""
+    desde = indice.marca - MARGEN_ACTUALIZACION
+    return {'$or': [
+        {'fecha_creacion': {'$gte': desde}},
+        {'fecha_actualizacion': {'$gte': desde}},
+    ]}
+
+
+def actualizar():
+    """
+    Actualiza el índice del proceso: recarga completa si venció RECOMENDACIONES_RECARGA,
+    nada si las colecciones no cambiaron, o solo los documentos nuevos y editados.
+    """
+    global _indice
+    indice = _indice
+    if time.monotonic() - indice.recargado >= Config.RECOMENDACIONES_RECARGA:
+        _indice = cargar_indice()
+        return
+
+    versiones = _versiones_actuales()
+    if versiones == indice.versiones:
+        return
+
+    marca = datetime.now(timezone.utc)
+    filtro = _filtro_cambios(indice)
+    indice.agregar(
+        db_votantes.find(filtro, PROYECCION_VOTANTES),
+        db_propuestas.find(filtro, PROYECCION_PROPUESTAS),
+    )
+    indice.marca = marca
+    indice.versiones = versiones
+
+
+def _mantener_indice(listo):
+    """Hilo del proceso: carga el índice completo (reintentando si falla) y lo mantiene actualizado."""
+    global _indice
+    while True:
+        try:
+            _indice = cargar_indice()
+            break
+        except Exception:
+            logger.exception('No se pudo cargar el índice de recomendaciones')
+            time.sleep(Config.RECOMENDACIONES_INTERVALO)
+    listo.set()
+
+    while True:
+        time.sleep(Config.RECOMENDACIONES_INTERVALO)
+        try:
+            actualizar()
+        except Exception:
+            logger.exception('No se pudo actualizar el índice de recomendaciones')
+
+
+def obtener_indice():
+    """
+    Índice del proceso. La primera vez (y tras un fork) arranca el hilo que lo carga
+    completo y lo actualiza cada RECOMENDACIONES_INTERVALO segundos; hasta que termina
+    la carga lanza IndiceNoListo, sin bloquear la petición.
+    Lanza RuntimeError si numpy no está instalado.
+    """
+    global _indice, _indice_pid, _indice_listo
+    if np is None:
+        raise RuntimeError('Las recomendaciones requieren numpy (pip install numpy)')
+    with _indice_lock:
+        if _indice_pid != os.getpid():
+            _indice = None
+            _indice_pid = os.getpid()
+            _indice_listo = threading.Event()
+            threading.Thread(
+                target=_mantener_indice, args=(_indice_listo,), name='recomendaciones', daemon=True
+            ).start()
+        if not _indice_listo.is_set():
+            raise IndiceNoListo('El índice de recomendaciones se está cargando, intenta de nuevo en unos segundos')
+        return _indice
+
+
+def recomendar_propuestas(id_votante, k):
+    """
+    Las k propuestas más similares al votante que todavía no votó, como [(id_propuesta, similitud)].
+    Devuelve None si el votante no está en el índice.
+    """
+    indice = obtener_indice()
+    votadas = [voto['id_propuesta'] for voto in db_votos.find({'id_votante': id_votante}, {'id_propuesta': 1})]
+    return indice.recomendar(id_votante, k, excluir=votadas)
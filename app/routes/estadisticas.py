@@ -1,5 +1,12 @@
-from flask import Blueprint, jsonify  # Importa herramientas de Flask para rutas y respuestas JSON
+import logging  # Registro de errores al recalcular el snapshot
+import threading  # Candado para recalcular el snapshot una sola vez
+import time  # Reloj para el tiempo de vida del snapshot
+from datetime import datetime, timezone  # Fecha de generación del snapshot
+from flask import Blueprint, jsonify, request  # Importa herramientas de Flask para rutas, solicitudes y respuestas JSON
 from app import mongo  # Importa la instancia de la base de datos MongoDB desde la app principal
+from app.config import Config  # Configuración (tamaño máximo de los rankings)
+from app.cache import estadisticas_caches  # Estadísticas de las cachés en memoria
+from app.evaluacion import estadisticas_evaluaciones  # Estadísticas de la caché de evaluaciones del modelo
 
 # Crea un Blueprint para agrupar las rutas relacionadas con estadísticas
 estadisticas_bp = Blueprint('estadisticas', __name__)
@@ -8,23 +15,204 @@ estadisticas_bp = Blueprint('estadisticas', __name__)
 db_propuestas = mongo.db.v_propuestas
 db_politicos = mongo.db.v_politicos
 db_votantes = mongo.db.v_votantes
+db_conteos = mongo.db.v_conteos  # Conteos de votos por político y por categoría
+
+logger = logging.getLogger(__name__)
+
+# Snapshot de las estadísticas del dashboard, compartido por todas las peticiones del proceso
+_snapshot = {'datos': None, 'generado': 0.0}
+_snapshot_lock = threading.Lock()  # Garantiza que solo un hilo recalcule el snapshot a la vez
+
+
+# Convierte la salida de un $group ({_id, total}) en un diccionario {valor: total}
+def a_diccionario(grupos):
+    return {str(g['_id']) if g['_id'] is not None else 'sin_dato': g['total'] for g in grupos}
+
+
+# Agrupa por un campo dentro del $facet, solo para los documentos de una colección
+def desglose_por(coleccion, campo):
+    return [
+        {'$match': {'coleccion': coleccion}},
+        {'$group': {'_id': f'${campo}', 'total': {'$sum': 1}}}
+    ]
+
+
+# Calcula totales y desgloses de las tres colecciones con una sola agregación
+def calcular_snapshot():
+    resultado = next(db_votantes.aggregate([
+        {'$project': {'_id': 0, 'coleccion': {'$literal': 'votantes'}, 'estado': 1}},
+        {'$unionWith': {'coll': db_politicos.name, 'pipeline': [
+            {'$project': {'_id': 0, 'coleccion': {'$literal': 'politicos'},
+                          'estado': 1, 'candidatura': 1, 'validacion': 1}}
+        ]}},
+        {'$unionWith': {'coll': db_propuestas.name, 'pipeline': [
+            {'$project': {'_id': 0, 'coleccion': {'$literal': 'propuestas'}, 'categoria': 1}}
+        ]}},
+        {'$facet': {
+            'totales': [{'$group': {'_id': '$coleccion', 'total': {'$sum': 1}}}],
+            'votantes_por_estado': desglose_por('votantes', 'estado'),
+            'politicos_por_estado': desglose_por('politicos', 'estado'),
+            'politicos_por_candidatura': desglose_por('politicos', 'candidatura'),
+            'politicos_por_validacion': desglose_por('politicos', 'validacion'),
+            'propuestas_por_categoria': desglose_por('propuestas', 'categoria'),
+        }}
+    ], allowDiskUse=True))
+
+    totales = a_diccionario(resultado['totales'])
+    return {
+        'votantes': totales.get('votantes', 0),
+        'politicos': totales.get('politicos', 0),
+        'propuestas': totales.get('propuestas', 0),
+        'desglose': {
+            'votantes': {
+                'estado': a_diccionario(resultado['votantes_por_estado'])
+            },
+            'politicos': {
+                'estado': a_diccionario(resultado['politicos_por_estado']),
+                'candidatura': a_diccionario(resultado['politicos_por_candidatura']),
+                'validacion': a_diccionario(resultado['politicos_por_validacion'])
+            },
+            'propuestas': {
+                'categoria': a_diccionario(resultado['propuestas_por_categoria'])
+            }
+        },
+        'fuente': 'snapshot',
+        'generado': datetime.now(timezone.utc).isoformat()
+    }
+
+
+# Conteo aproximado con los metadatos de cada colección (no recorre documentos)
+def conteos_estimados():
+    return {
+        'votantes': db_votantes.estimated_document_count(),
+        'politicos': db_politicos.estimated_document_count(),
+        'propuestas': db_propuestas.estimated_document_count(),
+        'fuente': 'estimado'
+    }
+
+
+# Devuelve el snapshot vigente; si expiró, un solo hilo lo recalcula mientras
+# los demás siguen sirviendo la copia anterior (o el conteo estimado si aún no hay)
+def obtener_snapshot():
+    datos = _snapshot['datos']
+    if datos is not None and time.monotonic() - _snapshot['generado'] < Config.DASHBOARD_TTL:
+        return datos
+
+    if not _snapshot_lock.acquire(blocking=False):
+        return datos if datos is not None else conteos_estimados()
+
+    try:
+        datos = calcular_snapshot()
+        _snapshot.update(datos=datos, generado=time.monotonic())
+        return datos
+    except Exception:
+        logger.exception('No se pudo recalcular el snapshot del dashboard')
+        return datos if datos is not None else conteos_estimados()
+    finally:
+        _snapshot_lock.release()
+
 
 # Ruta para obtener un resumen de conteos (para un dashboard)
 @estadisticas_bp.route('/dashboard', methods=['GET'])
 def resumen_conteos():
     try:
-        # Cuenta el número total de documentos en cada colección
-        total_votantes = db_votantes.count_documents({})
-        total_politicos = db_politicos.count_documents({})
-        total_propuestas = db_propuestas.count_documents({})
-
-        # Devuelve los totales en formato JSON con código de estado 200 (OK)
-        return jsonify({
-            'votantes': total_votantes,
-            'politicos': total_politicos,
-            'propuestas': total_propuestas
-        }), 200
+        # Devuelve los totales y desgloses del snapshot con código de estado 200 (OK)
+        return jsonify(obtener_snapshot()), 200
 
     except Exception as e:
         # Si ocurre un error, devuelve un mensaje con el error y código de estado 500 (Error interno del servidor)
         return jsonify({'error': str(e)}), 500
+
+
+# Ruta para consultar aciertos y fallos de las cachés en memoria del proceso
+@estadisticas_bp.route('/cache', methods=['GET'])
+def estadisticas_cache():
+    caches = estadisticas_caches()  # Estadísticas de todas las cachés registradas
+    caches['evaluaciones'] = estadisticas_evaluaciones()  # Incluye el nivel persistente y las llamadas al modelo
+    return jsonify(caches), 200
+
+
+# Lee el parámetro n (tamaño del ranking) de la query string
+def leer_top_n():
+    n = int(request.args.get('n', 10))
+    if n < 1:
+        raise ValueError('El parámetro n debe ser mayor que 0')
+    return min(n, Config.RANKING_MAXIMO)
+
+
+# Ruta para obtener las propuestas más votadas (opcionalmente filtradas por categoría)
+@estadisticas_bp.route('/ranking/propuestas', methods=['GET'])
+def ranking_propuestas():
+    try:
+        n = leer_top_n()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        filtro = {}
+        if request.args.get('categoria'):
+            filtro['categoria'] = request.args['categoria']
+
+        # Usa el índice sobre total_votos: no recorre los votos
+        propuestas = []
+        for propuesta in db_propuestas.find(
+            filtro,
+            {'titulo': 1, 'categoria': 1, 'id_politico': 1, 'total_votos': 1}
+        ).sort('total_votos', -1).limit(n):
+            propuesta.setdefault('total_votos', 0)
+            propuestas.append(propuesta)
+
+        return jsonify(propuestas), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# Ruta para obtener los políticos con más votos en el total de sus propuestas
+@estadisticas_bp.route('/ranking/politicos', methods=['GET'])
+def ranking_politicos():
+    try:
+        n = leer_top_n()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        conteos = list(db_conteos.find({'tipo': 'politico'}).sort('total_votos', -1).limit(n))
+
+        # Datos de los políticos del ranking en una sola consulta
+        politicos = {
+            p['_id']: p for p in db_politicos.find(
+                {'_id': {'$in': [c['clave'] for c in conteos]}},
+                {'nombre': 1, 'apellido': 1, 'candidatura': 1}
+            )
+        }
+
+        ranking = []
+        for conteo in conteos:
+            politico = politicos.get(conteo['clave'], {})
+            ranking.append({
+                'id_politico': conteo['clave'],
+                'nombre': politico.get('nombre'),
+                'apellido': politico.get('apellido'),
+                'candidatura': politico.get('candidatura'),
+                'total_votos': conteo['total_votos']
+            })
+
+        return jsonify(ranking), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# Ruta para obtener el total de votos por categoría, de mayor a menor
+@estadisticas_bp.route('/ranking/categorias', methods=['GET'])
+def ranking_categorias():
+    try:
+        ranking = [
+            {'categoria': conteo['clave'], 'total_votos': conteo['total_votos']}
+            for conteo in db_conteos.find({'tipo': 'categoria'}).sort('total_votos', -1)
+        ]
+        return jsonify(ranking), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,35 @@
+from flask import Blueprint, Response, request, jsonify, stream_with_context  # Herramientas de Flask para rutas y respuestas
+from app.exportacion import FORMATOS_EXPORTACION, exportar_votos  # Exportación de votos por lotes
+from app.streaming import leer_batch_size  # Tamaño de lote del cursor (batch_size)
+from app.utils import a_object_id
+
+# Crea un Blueprint para agrupar las rutas de exportación para auditoría
+exportacion_bp = Blueprint('exportacion', __name__)
+
+
+# Ruta para descargar todos los votos, una fila por voto (propuesta, votante, fecha, categoría y político),
+# como NDJSON (formato=ndjson) o CSV comprimido con gzip (formato=csv). La respuesta se escribe a medida
+# que se leen los lotes del cursor. Para reanudar una descarga cortada, desde=<id_voto> de la última
+# fila recibida.
+@exportacion_bp.route('/votos', methods=['GET'])
+def exportar_votos_auditoria():
+    formato = request.args.get('formato', 'ndjson').lower()
+    if formato not in FORMATOS_EXPORTACION:
+        return jsonify({'error': 'El parámetro formato debe ser "ndjson" o "csv"'}), 400
+
+    desde = request.args.get('desde')
+    if desde is not None and a_object_id(desde) is None:
+        return jsonify({'error': 'El parámetro desde debe ser el id de un voto'}), 400
+
+    try:
+        batch_size = leer_batch_size()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    mimetype, extension = FORMATOS_EXPORTACION[formato]
+    bloques = (bloque for bloque, _ in exportar_votos(formato, batch_size, a_object_id(desde)))
+    return Response(
+        stream_with_context(bloques),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=votos.{extension}'}
+    )
@@ -0,0 +1,52 @@
+import io
+from flask import Blueprint, request, jsonify  # Importa herramientas de Flask para rutas, solicitudes y respuestas
+from app.importacion import db_importaciones, db_errores, iniciar_importacion, importar  # Importación masiva por lotes
+from app.paginacion import paginar, respuesta_paginada  # Paginación por cursor de los listados
+from app.utils import a_object_id
+
+# Crea un Blueprint para agrupar las rutas de importación masiva
+importacion_bp = Blueprint('importacion', __name__)
+
+
+# Ruta para importar votantes, políticos o propuestas desde un archivo CSV o NDJSON.
+# El archivo llega como cuerpo de la petición o en el campo 'archivo' (multipart) y se lee
+# por lotes sin cargarlo completo. formato=csv|ndjson, batch_size opcional y
+# reanudar=<id> para continuar una importación interrumpida con el mismo archivo.
+@importacion_bp.route('/<tipo>', methods=['POST'])
+def importar_archivo(tipo):
+    try:
+        batch_size = int(request.args['batch_size']) if request.args.get('batch_size') else None
+        importacion = iniciar_importacion(tipo, request.args.get('formato', 'csv'), request.args.get('reanudar'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        archivo = request.files.get('archivo')
+        flujo = archivo.stream if archivo else request.stream
+        lineas = io.TextIOWrapper(flujo, encoding='utf-8-sig', newline='')
+        resultado = importar(importacion, lineas, batch_size)
+        return jsonify(resultado), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e), 'id_importacion': importacion['_id']}), 500
+
+
+# Ruta para consultar el avance y el resumen de una importación
+@importacion_bp.route('/<id>', methods=['GET'])
+def get_importacion(id):
+    importacion = db_importaciones.find_one({'_id': a_object_id(id)})
+    if not importacion:
+        return jsonify({'error': 'Importación no encontrada'}), 404
+
+    return jsonify(importacion)
+
+
+# Ruta para obtener las filas rechazadas de una importación, paginadas por cursor (limit, after)
+@importacion_bp.route('/<id>/errores', methods=['GET'])
+def get_errores_importacion(id):
+    try:
+        pagina = paginar(db_errores, {'id_importacion': a_object_id(id)})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return respuesta_paginada(pagina)
@@ -0,0 +1,11 @@
+from flask import Blueprint, Response  # Importa herramientas de Flask para rutas y respuestas
+from app.metricas import exportar_metricas  # Métricas de peticiones y consultas del proceso
+
+# Crea un Blueprint para exponer las métricas de la API
+metricas_bp = Blueprint('metricas', __name__)
+
+
+# Ruta para que Prometheus lea las métricas del proceso (formato de texto)
+@metricas_bp.route('/', methods=['GET'])
+def get_metricas():
+    return Response(exportar_metricas(), content_type='text/plain; version=0.0.4; charset=utf-8')
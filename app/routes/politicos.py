@@ -1,16 +1,22 @@
 from flask import Blueprint, request, jsonify  # Importa herramientas de Flask para rutas, solicitudes y respuestas
 from bson import ObjectId  # Para trabajar con IDs de documentos en MongoDB
 from app import mongo  # Importa la instancia de conexión a MongoDB
-from app.schemas import PoliticoSchema  # Importa el esquema de validación para políticos
+from app.schemas import PoliticoSchema, obtener_esquema, cargar  # Esquemas compartidos para validar y cargar datos
+from app.paginacion import paginar, respuesta_paginada  # Paginación por cursor de los listados
+from app.streaming import modo_streaming, respuesta_streaming  # Lectura en streaming (NDJSON / JSON)
+from app.versiones import condicional, incrementar_version  # ETag por versión de colección
+from app.cache import CacheDocumentos  # Caché de lectura por ID y por correo
 
 # Crea un Blueprint para agrupar las rutas relacionadas con políticos
 politicos_bp = Blueprint('politicos', __name__)
 
 # Accede a la colección de políticos en la base de datos
 db = mongo.db.v_politicos
+cache_politicos = CacheDocumentos('politicos', db)  # Búsquedas individuales por ID y correo
 
-# Instancia del esquema para validar datos de políticos
-politico_schema = PoliticoSchema()
+# Instancias del esquema para validar datos de políticos (completos y parciales)
+politico_schema = obtener_esquema(PoliticoSchema)
+politico_schema_parcial = obtener_esquema(PoliticoSchema, parcial=True)
 
 # Ruta para crear un nuevo político con validación
 @politicos_bp.route('/', methods=['POST'])
@@ -23,54 +29,55 @@ def create_politico():
 
         # Inserta el nuevo político en la base de datos
         result = db.insert_one(politico_data)
+        incrementar_version('v_politicos')  # Invalida los ETag de los listados
 
         # Busca el político recién creado para devolverlo como respuesta
         politico_creado = db.find_one({'_id': result.inserted_id})
-        politico_creado['_id'] = str(politico_creado['_id'])  # Convierte ObjectId a string para JSON
-
         return jsonify(politico_creado), 201  # Devuelve el político creado con código 201 (Creado)
 
     except Exception as e:
         # Devuelve un error interno del servidor si ocurre una excepción
         return jsonify({'error': str(e)}), 500
 
-# Ruta para obtener todos los políticos
+# Ruta para obtener los políticos paginados por cursor (limit, after; todos=true para la lista completa)
+# o en streaming con stream=ndjson|json y batch_size opcional
 @politicos_bp.route('/', methods=['GET'])
+@condicional('v_politicos')  # Responde 304 si el listado no cambió desde el ETag del cliente
 def get_politicos():
-    politicos = []  # Lista para almacenar los políticos encontrados
-    for doc in db.find():  # Itera sobre todos los documentos de la colección
-        doc['_id'] = str(doc['_id'])  # Convierte ObjectId a string para JSON
-        politicos.append(doc)
-    return jsonify(politicos)  # Devuelve la lista de políticos
+    try:
+        modo = modo_streaming()  # Formato de streaming solicitado (si lo hay)
+        if modo:
+            return respuesta_streaming(db, modo)  # Transmite los políticos por lotes
+        pagina = paginar(db)  # Obtiene la página solicitada
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400  # Parámetros de paginación inválidos
+
+    return respuesta_paginada(pagina)  # Devuelve la página de políticos
 
 # Ruta para obtener un político por su ID
 @politicos_bp.route('/<id>', methods=['GET'])
 def get_politico(id):
-    politico = db.find_one({'_id': ObjectId(id)})  # Busca el político por su ID
+    politico = cache_politicos.por_id(ObjectId(id))  # Busca el político por su ID (primero en caché)
     if not politico:
         return jsonify({'error': 'Político no encontrado'})  # Devuelve error si no se encuentra
 
-    politico['_id'] = str(politico['_id'])  # Convierte ObjectId a string para JSON
     return jsonify(politico)
 
 # Ruta para obtener un político por su correo
 @politicos_bp.route('/correo/<correo>', methods=['GET'])
 def get_politico_by_correo(correo):
-    politico = db.find_one({'correo': correo})  # Busca el político por el campo 'correo'
+    politico = cache_politicos.por_correo(correo)  # Busca el político por el campo 'correo' (primero en caché)
     if not politico:
         return jsonify({'error': 'Político no encontrado'})  # Devuelve error si no se encuentra
 
-    politico['_id'] = str(politico['_id'])  # Convierte ObjectId a string para JSON
     return jsonify(politico)
 
 # Ruta para actualizar un político con validación parcial
 @politicos_bp.route('/<id>', methods=['PUT'])
 def update_politico(id):
     try:
-        data = request.json  # Obtiene los datos JSON de la solicitud
-
-        # Valida los datos parcialmente (solo los campos enviados)
-        errores = politico_schema.validate(data, partial=True)
+        # Valida y limpia los datos parcialmente (solo los campos enviados)
+        data, errores = cargar(politico_schema_parcial, request.json)
         if errores:
             return jsonify({'errores': errores})  # Devuelve los errores de validación si los hay
 
@@ -78,10 +85,11 @@ def update_politico(id):
         result = db.update_one({'_id': ObjectId(id)}, {'$set': data})
         if result.matched_count == 0:
             return jsonify({'error': 'Político no encontrado'})  # Si no se encontró, devuelve error
+        incrementar_version('v_politicos')  # Invalida los ETag de los listados
+        cache_politicos.invalidar(ObjectId(id))  # Descarta la copia en caché
 
         # Obtiene el documento actualizado para devolverlo
         updated_politico = db.find_one({'_id': ObjectId(id)})
-        updated_politico['_id'] = str(updated_politico['_id'])  # Convierte ObjectId a string para JSON
         return jsonify(updated_politico)
 
     except Exception as e:
@@ -91,4 +99,6 @@ def update_politico(id):
 @politicos_bp.route('/<id>', methods=['DELETE'])
 def delete_politico(id):
     db.delete_one({'_id': ObjectId(id)})  # Elimina el político por su ID
+    incrementar_version('v_politicos')  # Invalida los ETag de los listados
+    cache_politicos.invalidar(ObjectId(id))  # Descarta la copia en caché
     return jsonify({'message': 'Político eliminado'})  # Devuelve mensaje de confirmación
@@ -1,41 +1,38 @@
 from flask import Blueprint, request, jsonify
 from bson import ObjectId
 from app import mongo
-import bcrypt
+import hashlib
+import json
 import jwt
-from app.schemas import VotanteSchema  # importamos el schema para validación de datos
+import uuid
+from datetime import datetime, timedelta, timezone
+from app.schemas import VotanteSchema, obtener_esquema, cargar  # esquemas compartidos para validar y cargar datos
 from app.config import Config
-from app.auth import token_required  # importa el decorador para protección de rutas con token
+from app.hashing import hash_password, check_password, necesita_rehash, programar_rehash, PoolSaturado
+from app.auth import token_required, revocar_token  # decorador para protección de rutas con token y revocación
+from app.paginacion import paginar, respuesta_paginada  # paginación por cursor de los listados
+from app.streaming import modo_streaming, respuesta_streaming  # lectura en streaming (NDJSON / JSON)
+from app.versiones import condicional, incrementar_version  # ETag por versión de colección
+from app.cache import CacheDocumentos  # caché de lectura por ID y por correo
+from app.recomendaciones import IndiceNoListo, recomendar_propuestas  # propuestas similares a las valoraciones del votante
+from app.utils import a_object_id
+from app.routes.propuestas import actualizar_votos_automaticos_votante  # emparejamiento incremental de votos automáticos
 
 votantes_bp = Blueprint('votantes', __name__)
 db = mongo.db.v_votantes  # colección MongoDB donde se almacenan los votantes
+db_propuestas = mongo.db.v_propuestas  # propuestas devueltas en las recomendaciones
+cache_votantes = CacheDocumentos('votantes', db)  # búsquedas individuales por ID y correo
 
 # Acceso directo a las variables de clase
-votante_schema = VotanteSchema()  # instancia del esquema para validar datos de votantes
+votante_schema = obtener_esquema(VotanteSchema)  # instancia del esquema para validar datos de votantes
+votante_schema_parcial = obtener_esquema(VotanteSchema, parcial=True)  # para actualizaciones parciales
 
 #*************************************************************************************************************
 # -------------------
-# 1. Hashear contraseña
+# 1 y 2. Hashear y verificar contraseña
 # -------------------
-def hash_password(password):
-    """
-    Genera un hash seguro para la contraseña usando bcrypt.
-    bcrypt.gensalt() genera una sal aleatoria para proteger contra ataques de rainbow table.
-    Devuelve la contraseña hasheada en formato string para que sea compatible con MongoDB.
-    """
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed.decode('utf-8')  # Guardamos como string para que MongoDB no tenga problemas
-
-# -------------------
-# 2. Verificar contraseña
-# -------------------
-def check_password(password, hashed):
-    """
-    Compara la contraseña en texto plano con el hash almacenado.
-    Devuelve True si coinciden, False en caso contrario.
-    """
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+# hash_password y check_password (app/hashing.py) ejecutan bcrypt en un pool acotado
+# fuera del hilo de la petición; si la cola está llena lanzan PoolSaturado.
 
 #-------------------------
 #3. Crear Token
@@ -49,9 +46,14 @@ def generar_token(votante_id):
     """
     Crea un token JWT firmado con el ID del votante.
     Este token se puede usar para autenticación y autorización en futuras peticiones.
+    Expira a los Config.JWT_EXPIRACION segundos y lleva un jti único para poder revocarlo.
     """
+    ahora = datetime.now(timezone.utc)
     payload = {
-        "votante_id": str(votante_id)
+        "votante_id": str(votante_id),
+        "iat": ahora,
+        "exp": ahora + timedelta(seconds=Config.JWT_EXPIRACION),
+        "jti": uuid.uuid4().hex
     }
     token = jwt.encode(payload, SECRET_KEY, JWT_ALGORITHM)
     return token
@@ -67,8 +69,7 @@ def create_votante():
     Devuelve el votante creado con su ID convertido a string para JSON.
     """
     try:
-        data = request.json
-        errores = votante_schema.validate(data)  # Validar datos con Marshmallow
+        data, errores = cargar(votante_schema, request.json)  # Validar y limpiar datos con Marshmallow
         if errores:
             return jsonify({'errores': errores})  # Devolver errores de validación
         
@@ -77,28 +78,37 @@ def create_votante():
             password_plano = data['password']
             data['password'] = hash_password(password_plano)
             
-        #Guardar en la base de datos
+        #Guardar en la base de datos (fecha_creacion para la actualización incremental de recomendaciones)
+        data['fecha_creacion'] = datetime.now(timezone.utc)
         result = db.insert_one(data)
+        incrementar_version('v_votantes')
         
         votante_creado = db.find_one({'_id': result.inserted_id}) # Buscar el votante creado
-        votante_creado['_id'] = str(votante_creado['_id']) # Convertir _id a string para poder enviarlo en JSON
-
         return jsonify(votante_creado), 201
+    except PoolSaturado as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 # Obtener todos los votantes
 @votantes_bp.route('/', methods=['GET'])
+@condicional('v_votantes')
 def get_votantes():
     """
-    Obtiene la lista completa de votantes.
+    Obtiene la lista de votantes paginada por cursor (limit, after).
+    Con ?todos=true devuelve la lista completa.
+    Con ?stream=ndjson|json (y batch_size opcional) transmite todos los votantes sin cargarlos en memoria.
     Convierte el campo _id a string para compatibilidad JSON.
     """
-    votantes = []
-    for doc in db.find():
-        doc['_id'] = str(doc['_id'])
-        votantes.append(doc)
-    return jsonify(votantes)
+    try:
+        modo = modo_streaming()
+        if modo:
+            return respuesta_streaming(db, modo)
+        pagina = paginar(db)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return respuesta_paginada(pagina)
 
 # Obtener un votante por ID
 @votantes_bp.route('/<id>', methods=['GET'])
@@ -107,13 +117,47 @@ def get_votante(id):
     Obtiene un votante específico a partir de su ID.
     Si no existe, devuelve un error.
     """
-    votante = db.find_one({'_id': ObjectId(id)})
+    votante = cache_votantes.por_id(ObjectId(id))
     if not votante:
         return jsonify({'error': 'Votante no encontrado'})
 
-    votante['_id'] = str(votante['_id'])
     return jsonify(votante)
 
+# Propuestas recomendadas para un votante
+@votantes_bp.route('/<id>/recomendaciones', methods=['GET'])
+def get_recomendaciones(id):
+    """
+    Devuelve las k propuestas (parámetro k) más parecidas a las valoraciones del votante
+    que todavía no votó, de mayor a menor similitud (1 = coincidencia exacta).
+    """
+    try:
+        k = int(request.args.get('k', Config.RECOMENDACIONES_K))
+        if k < 1:
+            raise ValueError('El parámetro k debe ser mayor que 0')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    k = min(k, Config.RECOMENDACIONES_K_MAXIMO)
+
+    id_votante = a_object_id(id)
+    try:
+        recomendadas = recomendar_propuestas(id_votante, k) if id_votante else None
+    except IndiceNoListo as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '5'}
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 503
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    if recomendadas is None:
+        return jsonify({'error': 'Votante no encontrado'})
+
+    # Documentos de las propuestas en una sola consulta, en el orden de la recomendación
+    propuestas = {p['_id']: p for p in db_propuestas.find({'_id': {'$in': [_id for _id, _ in recomendadas]}})}
+    resultado = []
+    for _id, similitud in recomendadas:
+        if _id in propuestas:  # Omite las borradas después de la última recarga del índice
+            resultado.append(dict(propuestas[_id], similitud=similitud))
+    return jsonify(resultado)
+
 # Obtener un votante por CORREO
 @votantes_bp.route('/correo/<correo>', methods=['GET'])
 def get_votante_by_correo(correo):
@@ -121,11 +165,10 @@ def get_votante_by_correo(correo):
     Busca un votante usando su correo electrónico.
     Ideal para operaciones de login o recuperación.
     """
-    votante = db.find_one({'correo': correo})
+    votante = cache_votantes.por_correo(correo)
     if not votante:
         return jsonify({'error': 'Votante no encontrado'})
 
-    votante['_id'] = str(votante['_id'])
     return jsonify(votante)
 
 
@@ -147,18 +190,57 @@ def get_votante_by_login():
         return jsonify({'error': 'Votante no encontrado'}), 404
 
     #validar contraseña
-    res = check_password(password, votante['password'])
+    try:
+        res = check_password(password, votante['password'])
+    except PoolSaturado as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
     
     if not res:
         return jsonify({"error": "Contraseña inválida"}), 401
+
+    # Si el factor de trabajo cambió, actualizar el hash en segundo plano
+    if necesita_rehash(votante['password']):
+        hash_anterior = votante['password']
+        def guardar_hash(nuevo_hash):
+            db.update_one({'_id': votante['_id'], 'password': hash_anterior}, {'$set': {'password': nuevo_hash}})
+            incrementar_version('v_votantes')
+            cache_votantes.invalidar(votante['_id'])
+        programar_rehash(password, guardar_hash)
     
     token = generar_token(votante['_id'])  # Generar token con el ID correcto
     
-    votante['_id'] = str(votante['_id'])
-    
     # Devolver datos del votante junto con token para autenticación futura
     return jsonify({"votante": votante, "token": token})
 
+# Cerrar sesión: revoca el token actual hasta su expiración
+@votantes_bp.route('/logout/', methods=['POST'])
+@token_required
+def logout():
+    """
+    Revoca el token con el que se hace la petición.
+    A partir de ese momento cualquier ruta protegida lo rechaza.
+    """
+    revocar_token(request.token, request.token_payload)
+    return jsonify({'message': 'Sesión cerrada'})
+
+def actualizar_votante(id_votante, data):
+    """
+    Aplica una actualización parcial ya validada y devuelve el votante actualizado
+    (None si no existe). Si cambió su valoración, vuelve a emparejarlo solo en las
+    categorías modificadas (agrega o retira sus votos automáticos).
+    """
+    data['fecha_actualizacion'] = datetime.now(timezone.utc)  # Para la actualización incremental de recomendaciones
+    anterior = db.find_one_and_update({'_id': id_votante}, {'$set': data}, projection={'valoracion': 1})
+    if anterior is None:
+        return None
+    incrementar_version('v_votantes')
+    cache_votantes.invalidar(id_votante)
+
+    if 'valoracion' in data:
+        actualizar_votos_automaticos_votante(id_votante, anterior.get('valoracion'), data['valoracion'])
+
+    return db.find_one({'_id': id_votante})
+
 # Actualizar votante MANUAL
 @votantes_bp.route('/manual/<id>', methods=['PUT'])
 @token_required #autorizacion de token 
@@ -168,17 +250,13 @@ def update_votante_manual(id):
     Valida datos parcialmente para permitir actualizaciones parciales.
     """
     try:
-        data = request.json
-        errores = votante_schema.validate(data, partial=True)
+        data, errores = cargar(votante_schema_parcial, request.json)
         if errores:
             return jsonify({'errores': errores})
         
-        result = db.update_one({'_id': ObjectId(id)}, {'$set': data})
-        if result.matched_count == 0:
+        updated_votante = actualizar_votante(ObjectId(id), data)
+        if updated_votante is None:
             return jsonify({'error': 'Votante no encontrado'})
-        
-        updated_votante = db.find_one({'_id': ObjectId(id)})
-        updated_votante['_id'] = str(updated_votante['_id'])
         return jsonify(updated_votante)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -193,17 +271,13 @@ def update_votante(id):
     Similar a la ruta manual pero sin protección de token.
     """
     try:
-        data = request.json
-        errores = votante_schema.validate(data, partial=True)
+        data, errores = cargar(votante_schema_parcial, request.json)
         if errores:
             return jsonify({'errores': errores})
         
-        result = db.update_one({'_id': ObjectId(id)}, {'$set': data})
-        if result.matched_count == 0:
+        updated_votante = actualizar_votante(ObjectId(id), data)
+        if updated_votante is None:
             return jsonify({'error': 'Votante no encontrado'})
-        
-        updated_votante = db.find_one({'_id': ObjectId(id)})
-        updated_votante['_id'] = str(updated_votante['_id'])
         return jsonify(updated_votante)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -216,16 +290,12 @@ def delete_votante(id):
     No valida existencia previa, elimina directamente.
     """
     db.delete_one({'_id': ObjectId(id)})
+    incrementar_version('v_votantes')
+    cache_votantes.invalidar(ObjectId(id))
     return jsonify({'message': 'Votante eliminado'})
 
-# Obetener preguntas de preferenicas
-@votantes_bp.route('/preguntas', methods=['GET'])
-def get_preguntas():
-    """
-    Devuelve las preguntas de preferencias políticas para las diferentes categorías.
-    Estas preguntas se usan para valorar la orientación política del votante.
-    """
-    preguntas = {
+# Preguntas de preferencias políticas por categoría (contenido fijo)
+PREGUNTAS_PREFERENCIAS = {
     "categorias": [
         {
             "numero": 1,
@@ -274,4 +344,16 @@ def get_preguntas():
         }
     ]
 }
-    return jsonify(preguntas)
+
+# Versión del contenido de las preguntas para su ETag (cambia solo si cambian las preguntas)
+VERSION_PREGUNTAS = hashlib.sha1(json.dumps(PREGUNTAS_PREFERENCIAS, sort_keys=True).encode('utf-8')).hexdigest()
+
+# Obetener preguntas de preferenicas
+@votantes_bp.route('/preguntas', methods=['GET'])
+@condicional(version=VERSION_PREGUNTAS)  # 304 si el cliente ya tiene esta versión
+def get_preguntas():
+    """
+    Devuelve las preguntas de preferencias políticas para las diferentes categorías.
+    Estas preguntas se usan para valorar la orientación política del votante.
+    """
+    return jsonify(PREGUNTAS_PREFERENCIAS)
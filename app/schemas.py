@@ -1,4 +1,5 @@
-from marshmallow import Schema, fields, validate
+from functools import lru_cache
+from marshmallow import Schema, ValidationError, fields, validate
 
 # VOTANTE: Schema para propuestas votadas
 class PropuestaVotadaSchema(Schema):
@@ -19,6 +20,11 @@ class VotanteSchema(Schema):
     estado = fields.String(required=True)
     preferencias = fields.List(fields.Raw())
     analisis = fields.String()
+    # Respuestas del cuestionario por categoría: {"<id de categoría>": [r1, r2, r3]}
+    valoracion = fields.Dict(
+        keys=fields.String(validate=validate.OneOf([str(cat_id) for cat_id in range(1, 11)])),
+        values=fields.List(fields.Integer(), validate=validate.Length(equal=3))
+    )
     propuestas_votadas = fields.List(fields.Nested(PropuestaVotadaSchema))
 
 # POLITICO: Schema para Político
@@ -67,3 +73,43 @@ class PropuestaSchema(Schema):
     descripcion = fields.String(required=True, validate=validate.Length(min=10))
     categoria = fields.String(required=True, validate=validate.OneOf(CATEGORIAS_VALIDAS))
     votos = fields.List(fields.Nested(VotoSchema))
+
+
+# ----------------------------------------
+# Instancias compartidas y carga de datos
+# ----------------------------------------
+
+@lru_cache(maxsize=None)
+def obtener_esquema(clase, parcial=False):
+    """
+    Devuelve una instancia única por (esquema, parcial), creada la primera vez que se pide.
+    Con parcial=True los campos requeridos pueden faltar (actualizaciones).
+    """
+    return clase(partial=parcial)
+
+
+def cargar(esquema, data):
+    """
+    Valida y deserializa data en un solo paso.
+    Devuelve (datos limpios, None) o (None, errores de validación).
+    Los datos limpios son los que se deben guardar (p. ej. edad "30" pasa a 30).
+    """
+    try:
+        return esquema.load(data), None
+    except ValidationError as e:
+        return None, e.messages
+
+
+def cargar_lote(esquema, registros):
+    """
+    Valida muchos registros con la misma instancia del esquema.
+    registros es un iterable de (clave, registro); devuelve ([(clave, datos limpios)], [(clave, errores)]).
+    """
+    validos = []
+    errores = []
+    for clave, registro in registros:
+        try:
+            validos.append((clave, esquema.load(registro)))
+        except ValidationError as e:
+            errores.append((clave, e.messages))
+    return validos, errores
@@ -0,0 +1,71 @@
+from itertools import islice
+from flask import request, Response, current_app, stream_with_context
+from app.config import Config
+
+# Formatos de streaming soportados y su tipo MIME
+FORMATOS_STREAMING = {
+    'ndjson': 'application/x-ndjson',  # un documento JSON por línea
+    'json': 'application/json',        # arreglo JSON escrito de forma incremental
+}
+
+
+def modo_streaming():
+    """
+    Devuelve el formato de streaming solicitado con ?stream=ndjson|json, o None.
+    Lanza ValueError si el formato no es válido.
+    """
+    modo = request.args.get('stream')
+    if modo is None:
+        return None
+
+    modo = modo.lower()
+    if modo not in FORMATOS_STREAMING:
+        raise ValueError('El parámetro stream debe ser "ndjson" o "json"')
+    return modo
+
+
+def leer_batch_size():
+    """Lee el parámetro batch_size (documentos por lote del cursor). Lanza ValueError si no es válido."""
+    try:
+        batch_size = int(request.args.get('batch_size', Config.STREAMING_BATCH_SIZE))
+    except ValueError:
+        raise ValueError('El parámetro batch_size debe ser un número entero')
+    if batch_size < 1:
+        raise ValueError('El parámetro batch_size debe ser mayor que 0')
+    return min(batch_size, Config.STREAMING_BATCH_SIZE_MAXIMO)
+
+
+def respuesta_streaming(coleccion, modo, filtro=None, transformar_lote=None):
+    """
+    Devuelve una respuesta que escribe los documentos a medida que el cursor de
+    PyMongo los entrega, en lotes de batch_size, sin cargar toda la colección en memoria.
+    transformar_lote recibe cada lote (lista de documentos) antes de serializarlo.
+    """
+    batch_size = leer_batch_size()
+    cursor = coleccion.find(filtro or {}, batch_size=batch_size)
+
+    def generar():
+        dumps = current_app.json.dumps
+        primero = True
+
+        if modo == 'json':
+            yield '['
+
+        while True:
+            lote = list(islice(cursor, batch_size))
+            if not lote:
+                break
+            if transformar_lote:
+                transformar_lote(lote)
+
+            if modo == 'ndjson':
+                yield ''.join(dumps(doc) + '\n' for doc in lote)
+            else:
+                separador = '' if primero else ','
+                yield separador + ','.join(dumps(doc) for doc in lote)
+            primero = False
+
+        if modo == 'json':
+            yield ']'
+
+    return Response(stream_with_context(generar()), mimetype=FORMATOS_STREAMING[modo])
@@ -0,0 +1,166 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from app import mongo
+from app.config import Config
+
+# Colección donde se guarda el estado de los trabajos en segundo plano.
+# Se guarda en MongoDB para que cualquier proceso pueda consultar su estado.
+db_trabajos = mongo.db.v_trabajos
+
+logger = logging.getLogger(__name__)
+
+# Un trabajo pendiente o en proceso solo avanza en el proceso que lo encoló; si ese proceso
+# termina (reinicio, despliegue, caída) el trabajo quedaría así para siempre
+ESTADOS_ACTIVOS = ('pendiente', 'en_proceso')
+
+
+# Pool de hilos del proceso actual (se crea bajo demanda y se recrea tras un fork)
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def obtener_executor():
+    """Devuelve el pool de trabajadores del proceso, creándolo si no existe."""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(
+                max_workers=Config.TRABAJOS_WORKERS,
+                thread_name_prefix='trabajos'
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def registrar_trabajo(tipo, datos):
+    """Guarda un trabajo nuevo en estado 'pendiente' y devuelve su _id (ObjectId)."""
+    ahora = datetime.now(timezone.utc)
+    result = db_trabajos.insert_one({
+        'tipo': tipo,
+        'estado': 'pendiente',
+        'etapa': None,
+        'intentos': 0,
+        'errores': [],
+        'datos': datos,
+        'resultado': None,
+        'fecha_creacion': ahora,
+        'fecha_actualizacion': ahora,
+    })
+    return result.inserted_id
+
+
+def encolar_trabajo(tipo, datos, funcion):
+    """
+    Registra un trabajo en estado 'pendiente' y lo envía al pool de trabajadores.
+    funcion(id_trabajo, datos) se ejecuta en segundo plano y su valor de retorno
+    se guarda como resultado del trabajo.
+    Devuelve el id del trabajo como string.
+    """
+    id_trabajo = registrar_trabajo(tipo, datos)
+    obtener_executor().submit(_ejecutar, id_trabajo, datos, funcion)
+    return str(id_trabajo)
+
+
+def obtener_trabajo(id_trabajo):
+    """
+    Devuelve el documento de un trabajo o None si no existe. Si sigue pendiente o en
+    proceso sin avanzar desde hace TRABAJOS_TIMEOUT segundos, antes lo marca como fallido.
+    """
+    if not ObjectId.is_valid(id_trabajo):
+        return None
+    trabajo = db_trabajos.find_one({'_id': ObjectId(id_trabajo)})
+    if trabajo and trabajo['estado'] in ESTADOS_ACTIVOS and _abandonado(trabajo):
+        marcar_trabajos_abandonados({'_id': trabajo['_id']})
+        trabajo = db_trabajos.find_one({'_id': trabajo['_id']})
+    return trabajo
+
+
+def _limite_abandono():
+    return datetime.now(timezone.utc) - timedelta(seconds=Config.TRABAJOS_TIMEOUT)
+
+
+def _abandonado(trabajo):
+    fecha = trabajo.get('fecha_actualizacion')
+    if fecha is None:
+        return True
+    if fecha.tzinfo is None:  # PyMongo devuelve fechas naive en UTC
+        fecha = fecha.replace(tzinfo=timezone.utc)
+    return fecha < _limite_abandono()
+
+
+def marcar_trabajos_abandonados(filtro=None):
+    """
+    Marca como fallidos los trabajos pendientes o en proceso que no se actualizan desde
+    hace más de TRABAJOS_TIMEOUT segundos. Devuelve cuántos marcó.
+    """
+    ahora = datetime.now(timezone.utc)
+    resultado = db_trabajos.update_many(
+        {
+            **(filtro or {}),
+            'estado': {'$in': list(ESTADOS_ACTIVOS)},
+            'fecha_actualizacion': {'$lt': _limite_abandono()},
+        },
+        {'$set': {
+            'estado': 'fallido',
+            'error': 'Trabajo abandonado: el proceso que lo ejecutaba terminó antes de completarlo',
+            'fecha_actualizacion': ahora,
+        }},
+    )
+    return resultado.modified_count
+
+
+def _marcar_abandonados_al_iniciar():
+    try:
+        marcados = marcar_trabajos_abandonados()
+        if marcados:
+            logger.warning('%d trabajos abandonados marcados como fallidos', marcados)
+    except Exception:
+        logger.exception('No se pudieron revisar los trabajos abandonados')
+
+
+def revisar_trabajos_abandonados():
+    """Marca los trabajos abandonados en un hilo aparte, sin retrasar el arranque."""
+    threading.Thread(target=_marcar_abandonados_al_iniciar, name='trabajos-abandonados', daemon=True).start()
+
+
+def actualizar_trabajo(id_trabajo, **campos):
+    """Actualiza los campos indicados de un trabajo (estado, etapa, resultado...)."""
+    campos['fecha_actualizacion'] = datetime.now(timezone.utc)
+    db_trabajos.update_one({'_id': id_trabajo}, {'$set': campos})
+
+
+def reintentar(id_trabajo, funcion, *args):
+    """
+    Ejecuta funcion(*args) hasta Config.TRABAJOS_REINTENTOS veces, con espera
+    exponencial entre intentos. Cada intento fallido queda registrado en el trabajo.
+    Si todos fallan, relanza la última excepción.
+    """
+    for intento in range(1, Config.TRABAJOS_REINTENTOS + 1):
+        db_trabajos.update_one({'_id': id_trabajo}, {'$inc': {'intentos': 1}})
+        try:
+            return funcion(*args)
+        except Exception as e:
+            db_trabajos.update_one(
+                {'_id': id_trabajo},
+                {'$push': {'errores': {'intento': intento, 'error': str(e)}}}
+            )
+            if intento == Config.TRABAJOS_REINTENTOS:
+                raise
+            time.sleep(Config.TRABAJOS_ESPERA_REINTENTO * 2 ** (intento - 1))
+
+
+def _ejecutar(id_trabajo, datos, funcion):
+    """Ejecuta un trabajo en el pool y registra su resultado o su fallo."""
+    actualizar_trabajo(id_trabajo, estado='en_proceso')
+    try:
+        resultado = funcion(id_trabajo, datos)
+        actualizar_trabajo(id_trabajo, estado='completado', etapa=None, resultado=resultado)
+    except Exception as e:
+        logger.exception('Trabajo %s fallido', id_trabajo)
+        actualizar_trabajo(id_trabajo, estado='fallido', error=str(e))
@@ -0,0 +1,16 @@
+from bson import ObjectId
+
+
+def a_object_id(valor):
+    """
+    Convierte un id a ObjectId. Acepta ObjectId, string o dict {"$oid": "..."}
+    (formato en que algunos documentos guardan las referencias).
+    Devuelve None si no es un id válido.
+    """
+    if isinstance(valor, dict):
+        valor = valor.get('$oid')
+    if isinstance(valor, ObjectId):
+        return valor
+    if isinstance(valor, str) and ObjectId.is_valid(valor):
+        return ObjectId(valor)
+    return None
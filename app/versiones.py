@@ -0,0 +1,119 @@
+import hashlib
+import logging
+import threading
+import time
+from functools import wraps
+from flask import request, make_response
+from pymongo import ReturnDocument
+from app import mongo
+from app.config import Config
+
+# Contador de versión por colección: {'_id': <colección>, 'version': n}.
+# Toda escritura de una colección incrementa su versión; los ETag se derivan de ella.
+db_versiones = mongo.db.v_versiones
+
+# Copia local de las versiones: colección -> (versión, momento de lectura).
+# Se relee de MongoDB cada VERSIONES_TTL segundos para ver las escrituras de otros procesos.
+_versiones = {}
+_versiones_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+# Incrementos diferidos: colección -> momento del último incremento, y colecciones
+# con un incremento ya programado
+_diferidas = {}
+_pendientes = set()
+_diferidas_lock = threading.Lock()
+
+
+def incrementar_version(*colecciones):
+    """Incrementa la versión de las colecciones indicadas (llamar después de cada escritura)."""
+    for coleccion in colecciones:
+        doc = db_versiones.find_one_and_update(
+            {'_id': coleccion},
+            {'$inc': {'version': 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        with _versiones_lock:
+            _versiones[coleccion] = (doc['version'], time.monotonic())
+
+
+def incrementar_version_diferida(coleccion):
+    """
+    Incrementa la versión como mucho una vez cada VERSIONES_TTL segundos por proceso, para
+    escrituras muy frecuentes que solo cambian contadores (votos): sin esto cada voto sería
+    una escritura sobre el mismo documento de v_versiones y el ETag del listado cambiaría
+    en cada petición. Si el último incremento fue hace menos, se programa uno solo al
+    final del intervalo, así que el cambio siempre acaba reflejándose.
+    """
+    with _diferidas_lock:
+        if coleccion in _pendientes:
+            return
+        espera = _diferidas.get(coleccion, float('-inf')) + Config.VERSIONES_TTL - time.monotonic()
+        if espera > 0:
+            _pendientes.add(coleccion)
+            temporizador = threading.Timer(espera, _incrementar_pendiente, [coleccion])
+            temporizador.daemon = True
+            temporizador.start()
+            return
+        _diferidas[coleccion] = time.monotonic()
+    incrementar_version(coleccion)
+
+
+def _incrementar_pendiente(coleccion):
+    with _diferidas_lock:
+        _pendientes.discard(coleccion)
+        _diferidas[coleccion] = time.monotonic()
+    try:
+        incrementar_version(coleccion)
+    except Exception:
+        logger.exception('No se pudo incrementar la versión de %s', coleccion)
+
+
+def obtener_version(coleccion):
+    """Devuelve la versión actual de una colección (desde la copia local si está vigente)."""
+    with _versiones_lock:
+        entrada = _versiones.get(coleccion)
+    if entrada is not None and time.monotonic() - entrada[1] < Config.VERSIONES_TTL:
+        return entrada[0]
+
+    doc = db_versiones.find_one({'_id': coleccion})
+    version = doc['version'] if doc else 0
+    with _versiones_lock:
+        _versiones[coleccion] = (version, time.monotonic())
+    return version
+
+
+def calcular_etag(*partes):
+    """ETag a partir de las partes indicadas y de la query string (cada variante tiene el suyo)."""
+    contenido = '|'.join(str(parte) for parte in partes) + '|' + request.query_string.decode('utf-8')
+    return hashlib.sha1(contenido.encode('utf-8')).hexdigest()
+
+
+def condicional(*colecciones, version=None):
+    """
+    Decorador para rutas GET cuyo resultado solo depende de las colecciones indicadas
+    (y de version, para contenido fijo que no está en la BD).
+    Si el If-None-Match del cliente coincide con el ETag actual responde 304 sin
+    ejecutar la ruta (sin consultar ni serializar documentos).
+    """
+    def decorador(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            etag = calcular_etag(
+                request.path,
+                version,
+                *(f'{coleccion}:{obtener_version(coleccion)}' for coleccion in colecciones)
+            )
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+                response.set_etag(etag, weak=True)
+                return response
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag, weak=True)
+            return response
+        return decorated
+    return decorador
@@ -0,0 +1,361 @@
+import logging
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from app import mongo
+from app.cache import CacheDocumentos
+from app.indices import aplicar_indices
+from app.utils import a_object_id
+from app.versiones import incrementar_version, incrementar_version_diferida
+
+logger = logging.getLogger(__name__)
+
+# Colección dedicada de votos: un documento por (propuesta, votante)
+db_votos = mongo.db.v_votos
+db_propuestas = mongo.db.v_propuestas
+
+# Caché de lectura de propuestas por _id; se invalida aquí al cambiar su total_votos
+cache_propuestas = CacheDocumentos('propuestas', db_propuestas)
+
+# Conteos agregados de votos por político y por categoría:
+# {'tipo': 'politico' | 'categoria', 'clave': <id_politico | categoria>, 'total_votos': n}
+db_conteos = mongo.db.v_conteos
+
+# Votos embebidos que la migración no pudo pasar a v_votos (id_votante inválido), tal
+# como estaban: {'id_propuesta', 'indice' (posición en el arreglo), 'voto', 'motivo', 'fecha'}
+db_votos_rechazados = mongo.db.v_votos_rechazados
+
+# Los índices se aseguran una vez por proceso, antes de la primera escritura (y en
+# cada escritura mientras alguno falle)
+_indices_listos = False
+_indices_lock = threading.Lock()
+
+
+def asegurar_indices():
+    """
+    Crea (si no existen) los índices declarados de votos y conteos. Es idempotente.
+    Si alguno no se pudo crear (por ejemplo el único de propuesta y votante, que evita
+    votos duplicados) lo registra en el log y lo reintenta en la siguiente escritura.
+    Los de v_propuestas se crean con flask crear-indices o CREAR_INDICES_AL_INICIAR.
+    """
+    global _indices_listos
+    with _indices_lock:
+        if _indices_listos:
+            return
+        errores = [
+            (coleccion, nombre, error)
+            for coleccion, nombre, error in aplicar_indices(['v_votos', 'v_conteos'])
+            if error
+        ]
+        for coleccion, nombre, error in errores:
+            logger.error('No se pudo crear el índice %s de %s: %s', nombre, coleccion, error)
+        _indices_listos = not errores
+
+
+def filtro_voto(id_propuesta, id_votante):
+    """Filtro que identifica el voto de un votante en una propuesta."""
+    return {'id_propuesta': id_propuesta, 'id_votante': id_votante}
+
+
+def insercion_voto(fecha=None, automatico=False):
+    """
+    Actualización para upsert de un voto: solo escribe al insertar, así que
+    repetirla sobre un voto existente no lo modifica ni lo duplica.
+    """
+    return {'$setOnInsert': {
+        'fecha': fecha or datetime.now(timezone.utc),
+        'automatico': automatico
+    }}
+
+
+def nuevo_voto(id_propuesta, id_votante, fecha=None, automatico=False):
+    """Datos de un voto a registrar con aplicar_votos / registrar_votos."""
+    return {
+        'id_propuesta': id_propuesta,
+        'id_votante': id_votante,
+        'fecha': fecha,
+        'automatico': automatico
+    }
+
+
+def actualizar_conteos(incrementos):
+    """
+    Aplica con $inc los cambios de votos {id_propuesta: delta} al total_votos de
+    cada propuesta y a los conteos de su político y de su categoría.
+    Usa una lectura (categoría y político de las propuestas) y dos bulk_write.
+    """
+    incrementos = {id_propuesta: delta for id_propuesta, delta in incrementos.items() if delta}
+    if not incrementos:
+        return
+    asegurar_indices()
+
+    propuestas = db_propuestas.find(
+        {'_id': {'$in': list(incrementos)}},
+        {'categoria': 1, 'id_politico': 1}
+    )
+
+    operaciones_propuestas = []
+    agregados = Counter()
+    for propuesta in propuestas:
+        delta = incrementos[propuesta['_id']]
+        operaciones_propuestas.append(
+            UpdateOne({'_id': propuesta['_id']}, {'$inc': {'total_votos': delta}})
+        )
+        for clave in claves_conteo(propuesta):
+            agregados[clave] += delta
+
+    if operaciones_propuestas:
+        db_propuestas.bulk_write(operaciones_propuestas, ordered=False)
+        # Solo cambian contadores: un incremento por intervalo basta para los ETag y las cachés
+        incrementar_version_diferida('v_propuestas')
+        cache_propuestas.invalidar(*incrementos)
+
+    operaciones_conteos = [
+        UpdateOne({'tipo': tipo, 'clave': clave}, {'$inc': {'total_votos': delta}}, upsert=True)
+        for (tipo, clave), delta in agregados.items()
+        if delta
+    ]
+    if operaciones_conteos:
+        db_conteos.bulk_write(operaciones_conteos, ordered=False)
+
+
+def claves_conteo(propuesta):
+    """Claves de v_conteos a las que suman los votos de una propuesta: [(tipo, clave)]."""
+    claves = []
+    id_politico = a_object_id(propuesta.get('id_politico'))
+    if id_politico is not None:
+        claves.append(('politico', id_politico))
+    if propuesta.get('categoria'):
+        claves.append(('categoria', propuesta['categoria']))
+    return claves
+
+
+def mover_conteos(anterior, nueva):
+    """
+    Tras editar la categoría o el político de una propuesta, pasa su total_votos de
+    los conteos anteriores (anterior: documento antes de la edición) a los nuevos
+    (nueva: documento después), con un único bulk_write.
+    """
+    total = anterior.get('total_votos', 0)
+    agregados = Counter()
+    for clave in claves_conteo(anterior):
+        agregados[clave] -= total
+    for clave in claves_conteo(nueva):
+        agregados[clave] += total
+
+    operaciones = [
+        UpdateOne({'tipo': tipo, 'clave': clave}, {'$inc': {'total_votos': delta}}, upsert=True)
+        for (tipo, clave), delta in agregados.items()
+        if delta
+    ]
+    if operaciones:
+        db_conteos.bulk_write(operaciones, ordered=False)
+
+
+def registrar_voto(id_propuesta, id_votante, automatico=False):
+    """
+    Registra un voto con un único upsert atómico y actualiza los conteos.
+    Devuelve True si el voto es nuevo y False si el votante ya había votado.
+    """
+    asegurar_indices()
+    result = db_votos.update_one(
+        filtro_voto(id_propuesta, id_votante),
+        insercion_voto(automatico=automatico),
+        upsert=True
+    )
+    if result.upserted_id is None:
+        return False
+
+    actualizar_conteos({id_propuesta: 1})
+    return True
+
+
+def aplicar_votos(votos):
+    """
+    Registra muchos votos (ver nuevo_voto) como upserts condicionales en un solo
+    bulk_write sin orden: un fallo en un voto no detiene los demás.
+    Actualiza los conteos con los votos realmente insertados.
+    Devuelve (indices_nuevos, errores): los índices de los votos insertados y un
+    dict {índice: error} de los que fallaron.
+    Un error de clave duplicada (dos upserts simultáneos del mismo voto) no se
+    considera error: el voto ya existe.
+    """
+    if not votos:
+        return set(), {}
+    asegurar_indices()
+
+    operaciones = [
+        UpdateOne(
+            filtro_voto(voto['id_propuesta'], voto['id_votante']),
+            insercion_voto(voto.get('fecha'), voto.get('automatico', False)),
+            upsert=True
+        )
+        for voto in votos
+    ]
+
+    try:
+        resultado = db_votos.bulk_write(operaciones, ordered=False).bulk_api_result
+    except BulkWriteError as e:
+        resultado = e.details
+
+    indices_nuevos = {u['index'] for u in resultado.get('upserted', [])}
+    errores = {
+        error['index']: error.get('errmsg', 'Error al registrar el voto')
+        for error in resultado.get('writeErrors', [])
+        if error.get('code') != 11000
+    }
+
+    actualizar_conteos(Counter(votos[indice]['id_propuesta'] for indice in indices_nuevos))
+    return indices_nuevos, errores
+
+
+def registrar_votos(votos):
+    """Registra muchos votos en un solo bulk_write. Devuelve el número de votos nuevos."""
+    indices_nuevos, _ = aplicar_votos(votos)
+    return len(indices_nuevos)
+
+
+def sincronizar_votos_automaticos(id_votante, agregar, retirar):
+    """
+    Registra los votos automáticos del votante en las propuestas de agregar (en un
+    único bulk_write sin orden) y retira los de retirar con un delete_one por propuesta
+    (solo si son automáticos: un voto manual nunca se retira). Actualiza los conteos
+    solo con los votos que realmente se insertaron o se borraron.
+    Devuelve (votos agregados, votos retirados).
+    """
+    agregar = list(agregar)
+    retirar = list(retirar)
+    if not agregar and not retirar:
+        return 0, 0
+    asegurar_indices()
+
+    incrementos = Counter()
+    agregados = 0
+    if agregar:
+        fecha = datetime.now(timezone.utc)
+        try:
+            resultado = db_votos.bulk_write([
+                UpdateOne(filtro_voto(id_propuesta, id_votante), insercion_voto(fecha, automatico=True), upsert=True)
+                for id_propuesta in agregar
+            ], ordered=False).bulk_api_result
+        except BulkWriteError as e:
+            resultado = e.details
+        upserted = resultado.get('upserted', [])
+        incrementos.update(agregar[u['index']] for u in upserted)
+        agregados = len(upserted)
+
+    # Un delete_one por propuesta: deleted_count dice exactamente cuáles retiró este proceso
+    # (otro proceso puede retirar los mismos votos a la vez y solo uno los descuenta)
+    retirados = 0
+    for id_propuesta in retirar:
+        if db_votos.delete_one({**filtro_voto(id_propuesta, id_votante), 'automatico': True}).deleted_count:
+            incrementos[id_propuesta] -= 1
+            retirados += 1
+
+    actualizar_conteos(incrementos)
+    return agregados, retirados
+
+
+def eliminar_voto(id_propuesta, id_votante):
+    """Elimina un voto con un único delete y actualiza los conteos. Devuelve True si existía."""
+    result = db_votos.delete_one(filtro_voto(id_propuesta, id_votante))
+    if result.deleted_count == 0:
+        return False
+
+    actualizar_conteos({id_propuesta: -1})
+    return True
+
+
+def eliminar_votos_propuesta(propuesta):
+    """
+    Elimina todos los votos de una propuesta ya borrada y descuenta esos votos
+    de los conteos de su político y su categoría.
+    """
+    eliminados = db_votos.delete_many({'id_propuesta': propuesta['_id']}).deleted_count
+
+    agregados = claves_conteo(propuesta)
+    if eliminados and agregados:
+        db_conteos.bulk_write([
+            UpdateOne({'tipo': tipo, 'clave': clave}, {'$inc': {'total_votos': -eliminados}})
+            for tipo, clave in agregados
+        ], ordered=False)
+    return eliminados
+
+
+def recalcular_conteos():
+    """
+    Reconstruye desde v_votos el total_votos de todas las propuestas y los conteos
+    por político y categoría. Sirve para inicializarlos o corregir desvíos.
+    Devuelve el número de propuestas con votos.
+    """
+    asegurar_indices()
+    totales = {
+        doc['_id']: doc['total']
+        for doc in db_votos.aggregate([
+            {'$group': {'_id': '$id_propuesta', 'total': {'$sum': 1}}}
+        ], allowDiskUse=True)
+    }
+
+    db_propuestas.update_many({}, {'$set': {'total_votos': 0}})
+    db_conteos.delete_many({})
+
+    incrementar_version('v_propuestas')
+    ids = list(totales)
+    for inicio in range(0, len(ids), 1000):
+        actualizar_conteos({id_propuesta: totales[id_propuesta] for id_propuesta in ids[inicio:inicio + 1000]})
+    return len(totales)
+
+
+def migrar_votos_embebidos(batch_size=500):
+    """
+    Mueve los votos embebidos en v_propuestas.votos a la colección v_votos, por lotes.
+    Los votos con un id_votante inválido se copian tal cual a v_votos_rechazados.
+    Ambas escrituras son upserts (no duplican si se vuelve a ejecutar) y solo después
+    se elimina el arreglo de las propuestas ya migradas, por lo que se puede
+    interrumpir y reanudar sin perder ni duplicar votos.
+    Devuelve (propuestas_migradas, votos_migrados, votos_rechazados).
+    """
+    asegurar_indices()
+    propuestas_migradas = 0
+    votos_migrados = 0
+    votos_rechazados = 0
+
+    while True:
+        lote = list(db_propuestas.find(
+            {'votos': {'$exists': True}},
+            {'votos': 1}
+        ).limit(batch_size))
+        if not lote:
+            break
+
+        votos = []
+        rechazados = []
+        for propuesta in lote:
+            for indice, voto in enumerate(propuesta.get('votos') or []):
+                id_votante = a_object_id(voto.get('id_votante')) if isinstance(voto, dict) else None
+                if id_votante is None:
+                    rechazados.append(UpdateOne(
+                        {'id_propuesta': propuesta['_id'], 'indice': indice},
+                        {'$setOnInsert': {
+                            'voto': voto, 'motivo': 'id_votante inválido', 'fecha': datetime.now(timezone.utc),
+                        }},
+                        upsert=True,
+                    ))
+                    continue
+                votos.append(nuevo_voto(propuesta['_id'], id_votante, fecha=voto.get('fecha')))
+
+        votos_migrados += registrar_votos(votos)
+        if rechazados:
+            db_votos_rechazados.bulk_write(rechazados, ordered=False)
+            votos_rechazados += len(rechazados)
+        db_propuestas.update_many(
+            {'_id': {'$in': [p['_id'] for p in lote]}},
+            {'$unset': {'votos': ''}}
+        )
+        propuestas_migradas += len(lote)
+
+    if propuestas_migradas:
+        incrementar_version('v_propuestas')
+    return propuestas_migradas, votos_migrados, votos_rechazados
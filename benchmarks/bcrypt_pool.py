@@ -0,0 +1,116 @@
+"""
+Benchmark: bcrypt en el hilo de la petición vs. en el pool acotado de app/hashing.py.
+
+Simula una ráfaga de inicios de sesión concurrentes (un hilo por petición, como un
+servidor WSGI con hilos) y, al mismo tiempo, peticiones ligeras tipo health check.
+Reporta logins por segundo, latencia de los logins atendidos, latencia de las
+peticiones ligeras y cuántos logins se rechazaron rápido (503).
+
+El pool no mejora los logins por segundo (suelen quedar iguales o un poco por debajo
+del cálculo directo): lo que cambia es que rechaza el exceso en lugar de encolarlo,
+así que bajan la latencia de los logins atendidos y la de las peticiones ligeras.
+
+Uso:
+    python benchmarks/bcrypt_pool.py --concurrencia 64 --logins 256 --rounds 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import bcrypt  # noqa: E402
+from app import hashing  # noqa: E402
+from app.config import Config  # noqa: E402
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p / 100))]
+
+
+def escenario(nombre, verificar, args, hashed):
+    latencias_login = []
+    latencias_ligeras = []
+    rechazados = 0
+    lock = threading.Lock()
+    terminado = threading.Event()
+
+    def login():
+        nonlocal rechazados
+        inicio = time.perf_counter()
+        try:
+            verificar('secreto123', hashed)
+        except hashing.PoolSaturado:
+            with lock:
+                rechazados += 1
+            return
+        with lock:
+            latencias_login.append(time.perf_counter() - inicio)
+
+    def peticiones_ligeras():
+        # Una petición ligera ocupa un hilo del servidor durante un trabajo mínimo
+        while not terminado.is_set():
+            inicio = time.perf_counter()
+            servidor.submit(sum, range(1000)).result()
+            latencias_ligeras.append(time.perf_counter() - inicio)
+            time.sleep(0.01)
+
+    # Hilos del "servidor": los logins y las peticiones ligeras compiten por ellos
+    servidor = ThreadPoolExecutor(max_workers=args.concurrencia)
+    sonda = threading.Thread(target=peticiones_ligeras)
+    inicio = time.perf_counter()
+    sonda.start()
+    futuros = [servidor.submit(login) for _ in range(args.logins)]
+    for futuro in futuros:
+        futuro.result()
+    duracion = time.perf_counter() - inicio
+    terminado.set()
+    sonda.join()
+    servidor.shutdown()
+
+    return {
+        'escenario': nombre,
+        'logins_atendidos': len(latencias_login),
+        'logins_rechazados': rechazados,
+        'logins_por_segundo': len(latencias_login) / duracion,
+        'login_p50_ms': percentil(latencias_login, 50) * 1000,
+        'login_p95_ms': percentil(latencias_login, 95) * 1000,
+        'ligera_p50_ms': percentil(latencias_ligeras, 50) * 1000,
+        'ligera_p95_ms': percentil(latencias_ligeras, 95) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrencia', type=int, default=64, help='Hilos del servidor simulado')
+    parser.add_argument('--logins', type=int, default=256, help='Inicios de sesión en la ráfaga')
+    parser.add_argument('--rounds', type=int, default=10, help='Factor de trabajo de bcrypt')
+    args = parser.parse_args()
+
+    Config.BCRYPT_ROUNDS = args.rounds
+    hashed = bcrypt.hashpw(b'secreto123', bcrypt.gensalt(args.rounds)).decode('utf-8')
+
+    directo = lambda password, h: bcrypt.checkpw(password.encode('utf-8'), h.encode('utf-8'))  # noqa: E731
+    resultados = [
+        escenario('directo (hilo de la petición)', directo, args, hashed),
+        escenario(f'pool ({Config.BCRYPT_WORKERS} hilos, cola {Config.BCRYPT_COLA_MAXIMA})',
+                  hashing.check_password, args, hashed),
+    ]
+
+    for r in resultados:
+        print(f"\n{r['escenario']}")
+        print(f"  logins atendidos / rechazados: {r['logins_atendidos']} / {r['logins_rechazados']}")
+        print(f"  logins por segundo:           {r['logins_por_segundo']:.1f}")
+        print(f"  login p50 / p95:              {r['login_p50_ms']:.1f} / {r['login_p95_ms']:.1f} ms")
+        print(f"  petición ligera p50 / p95:    {r['ligera_p50_ms']:.1f} / {r['ligera_p95_ms']:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
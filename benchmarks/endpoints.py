@@ -0,0 +1,505 @@
+"""
+Benchmark: latencia, rendimiento y consultas a MongoDB de todas las rutas de la API.
+
+Siembra un conjunto de datos sintético y reproducible (--semilla) de votantes con
+valoraciones, políticos, administradores, propuestas y sus votos en v_votos, y
+recorre cada ruta de app/routes/ con el cliente de pruebas de Flask. Por ruta
+reporta p50/p95/p99, peticiones por segundo, respuestas 4xx/5xx y consultas a
+MongoDB por petición, y guarda todo en un JSON para comparar versiones.
+
+Usa la base de datos de --mongo-uri (SUS COLECCIONES SE BORRAN antes de sembrar;
+por defecto autovote_benchmark en localhost) o, con --mongomock, una base en
+memoria (requiere `pip install mongomock`; no cuenta consultas y no soporta
+todas las operaciones, así que algunas rutas pueden responder 500).
+
+Uso:
+    python benchmarks/endpoints.py --votantes 10000 --politicos 200 --propuestas 2000 --votos 20
+    python benchmarks/endpoints.py --mongomock --peticiones 50 --salida resultados.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bson import ObjectId  # noqa: E402
+from pymongo import monitoring  # noqa: E402
+
+CATEGORIAS = [
+    'Economía y Empleo', 'Educación', 'Salud', 'Seguridad y Justicia', 'Medio Ambiente',
+    'Infraestructura y Transporte', 'Política Social y Derechos Humanos',
+    'Gobernabilidad y Reforma Política', 'Cultura, Ciencia y Tecnología', 'Relaciones Exteriores'
+]
+ESTADOS = ['Jalisco', 'Nuevo León', 'Puebla', 'Yucatán', 'Sonora', 'Oaxaca']
+CANDIDATURAS = ['presidente', 'gobernador', 'presidente municipal']
+PASSWORD = 'benchmark123'
+LOTE = 5000
+
+
+class ContadorConsultas(monitoring.CommandListener):
+    """Cuenta los comandos enviados a MongoDB desde el hilo del benchmark."""
+
+    def __init__(self, activo=True):
+        self.hilo = threading.get_ident()
+        self.total = 0
+        self.activo = activo  # False si el cliente no emite eventos de monitoreo (mongomock)
+
+    def started(self, event):
+        if threading.get_ident() == self.hilo:
+            self.total += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p / 100))]
+
+
+def usar_mongomock():
+    """Sustituye el MongoClient de Flask-PyMongo por uno de mongomock (en memoria)."""
+    try:
+        import mongomock
+    except ImportError:
+        sys.exit('--mongomock requiere el paquete mongomock (pip install mongomock)')
+    import flask_pymongo
+    from mongomock.collection import BulkOperationBuilder
+
+    class ClienteEnMemoria(mongomock.MongoClient):
+        def __init__(self, uri, *args, **opciones):
+            super().__init__(uri)
+
+    # Las operaciones de bulk_write de pymongo 4.11+ pasan argumentos que mongomock no conoce
+    for nombre in ('add_update', 'add_replace', 'add_delete'):
+        original = getattr(BulkOperationBuilder, nombre)
+
+        def compatible(self, *args, _original=original, **opciones):
+            opciones.pop('sort', None)
+            opciones.pop('namespace', None)
+            return _original(self, *args, **opciones)
+
+        setattr(BulkOperationBuilder, nombre, compatible)
+
+    flask_pymongo.MongoClient = ClienteEnMemoria
+
+
+def persona(rng, i, tipo):
+    return {
+        'nombre': f'Nombre{i}',
+        'apellido': f'Apellido{i}',
+        'edad': rng.randint(18, 80),
+        'correo': f'{tipo}{i}@benchmark.mx',
+        'codigo_postal': f'{rng.randint(10000, 99999)}',
+        'colonia': f'Colonia {rng.randint(1, 500)}',
+        'ciudad': f'Ciudad {rng.randint(1, 100)}',
+        'estado': rng.choice(ESTADOS),
+    }
+
+
+def valoracion(rng):
+    return [rng.randint(1, 5) for _ in range(3)]
+
+
+def insertar_por_lotes(coleccion, documentos):
+    for inicio in range(0, len(documentos), LOTE):
+        coleccion.insert_many(documentos[inicio:inicio + LOTE], ordered=False)
+
+
+def sembrar(db, args, rng, password_hash):
+    """Borra la base de datos de benchmark y la llena con datos sintéticos. Devuelve los ids sembrados."""
+    from app import votos
+    from app.indices import aplicar_indices
+
+    for nombre in db.list_collection_names():
+        db.drop_collection(nombre)
+
+    ahora = datetime.now(timezone.utc)
+
+    politicos = []
+    for i in range(args.politicos):
+        politico = persona(rng, i, 'politico')
+        politico.update(
+            _id=ObjectId(),
+            candidatura=rng.choice(CANDIDATURAS),
+            cedula_politica=f'CED{i:06d}',
+            validacion=rng.choice(['valida', 'invalida', 'pendiente']),
+        )
+        politicos.append(politico)
+
+    votantes = []
+    for i in range(args.votantes):
+        votante = persona(rng, i, 'votante')
+        votante.update(
+            _id=ObjectId(),
+            password=password_hash,
+            valoracion={str(c): valoracion(rng) for c in range(1, len(CATEGORIAS) + 1)},
+        )
+        votantes.append(votante)
+
+    administradores = []
+    for i in range(max(1, args.politicos // 50)):
+        administrador = persona(rng, i, 'administrador')
+        administrador['_id'] = ObjectId()
+        administradores.append(administrador)
+
+    propuestas = []
+    documentos_votos = []
+    for i in range(args.propuestas):
+        propuesta = {
+            '_id': ObjectId(),
+            'id_politico': rng.choice(politicos)['_id'],
+            'titulo': f'Propuesta sintética número {i}',
+            'descripcion': 'Descripción de la propuesta para mejorar los servicios públicos. ' * 3,
+            'categoria': rng.choice(CATEGORIAS),
+            'valoracion': valoracion(rng),
+            'fecha_creacion': ahora - timedelta(minutes=i),
+        }
+        # Número de votos alrededor de --votos, con algunas propuestas muy votadas
+        n_votos = min(len(votantes), int(rng.expovariate(1 / args.votos))) if args.votos else 0
+        for votante in rng.sample(votantes, n_votos):
+            documentos_votos.append({
+                'id_propuesta': propuesta['_id'],
+                'id_votante': votante['_id'],
+                'fecha': ahora,
+                'automatico': rng.random() < 0.3,
+            })
+        propuesta['total_votos'] = n_votos
+        propuestas.append(propuesta)
+
+    insertar_por_lotes(db.v_politicos, politicos)
+    insertar_por_lotes(db.v_votantes, votantes)
+    insertar_por_lotes(db.v_administradores, administradores)
+    insertar_por_lotes(db.v_propuestas, propuestas)
+    insertar_por_lotes(db.v_votos, documentos_votos)
+
+    for coleccion, indice, error in aplicar_indices():
+        if error:
+            print(f'  aviso: índice {coleccion}.{indice} no creado: {error}')
+    votos.recalcular_conteos()
+
+    return {
+        'politicos': [p['_id'] for p in politicos],
+        'votantes': [v['_id'] for v in votantes],
+        'administradores': [a['_id'] for a in administradores],
+        'propuestas': [p['_id'] for p in propuestas],
+        'votos': [(v['id_propuesta'], v['id_votante']) for v in documentos_votos],
+        'total_votos': len(documentos_votos),
+    }
+
+
+def esperar_recomendaciones(cliente, ids, limite=300):
+    """
+    Espera a que el hilo del proceso termine de cargar el índice de recomendaciones
+    (mientras tanto la ruta responde 503) y comprueba que la ruta ya responde 200.
+    """
+    from app.recomendaciones import IndiceNoListo, obtener_indice
+
+    fin = time.monotonic() + limite
+    while True:
+        try:
+            obtener_indice()
+            break
+        except IndiceNoListo:
+            if time.monotonic() > fin:
+                raise
+            time.sleep(0.1)
+
+    respuesta = cliente.get(f'/api/votante/{ids["votantes"][0]}/recomendaciones')
+    assert respuesta.status_code == 200, f'recomendaciones respondió {respuesta.status_code}: {respuesta.get_data(as_text=True)}'
+
+
+def escenarios(db, ids, rng, cliente):
+    """
+    Una entrada por ruta: (nombre, función(i) -> (método, url, cuerpo, cabeceras)).
+    La función prepara los datos que la petición necesita (no se mide) y devuelve la petición.
+    El cuerpo es un objeto que se envía como JSON o, si es bytes, el cuerpo crudo.
+    """
+    from app.routes.votantes import generar_token
+
+    def votante():
+        return rng.choice(ids['votantes'])
+
+    def politico():
+        return rng.choice(ids['politicos'])
+
+    def propuesta():
+        return rng.choice(ids['propuestas'])
+
+    def correo_votante():
+        return f'votante{rng.randrange(len(ids["votantes"]))}@benchmark.mx'
+
+    def token():
+        return {'Authorization': f'Bearer {generar_token(votante())}'}
+
+    def nuevo_votante(i):
+        datos = persona(rng, i, f'nuevo{rng.getrandbits(32)}-votante')
+        datos['password'] = PASSWORD
+        return datos
+
+    def nuevo_politico(i):
+        datos = persona(rng, i, f'nuevo{rng.getrandbits(32)}-politico')
+        datos.update(candidatura=rng.choice(CANDIDATURAS), cedula_politica=f'NUEVA{i}', validacion='pendiente')
+        return datos
+
+    def nueva_propuesta(i):
+        return {
+            'id_politico': str(politico()),
+            'titulo': f'Propuesta de benchmark {i}',
+            'descripcion': 'Descripción de una propuesta creada durante el benchmark.',
+            'categoria': rng.choice(CATEGORIAS),
+        }
+
+    def desechable(coleccion, documento):
+        return db[coleccion].insert_one(documento).inserted_id
+
+    def voto_existente():
+        if ids['votos']:
+            return ids['votos'].pop(rng.randrange(len(ids['votos'])))
+        return propuesta(), votante()
+
+    def archivo_importacion(i, filas=20):
+        """NDJSON de votantes nuevos; una de cada diez filas es inválida (va a los errores)."""
+        lineas = []
+        for fila in range(filas):
+            datos = nuevo_votante(i * filas + fila)
+            if fila % 10 == 9:
+                datos['edad'] = 'no es un número'
+            lineas.append(json.dumps(datos))
+        return ('\n'.join(lineas) + '\n').encode('utf-8')
+
+    id_importacion = {}
+
+    def importacion():
+        """Id de una importación hecha (sin medir) con la misma ruta POST."""
+        if 'id' not in id_importacion:
+            respuesta = cliente.post('/api/importar/votantes?formato=ndjson', data=archivo_importacion(-1))
+            assert respuesta.status_code == 200, respuesta.get_data(as_text=True)
+            id_importacion['id'] = respuesta.get_json()['_id']
+        return id_importacion['id']
+
+    id_trabajo = {}
+
+    def trabajo():
+        if 'id' not in id_trabajo:
+            id_trabajo['id'] = db.v_trabajos.find_one({}, {'_id': 1})['_id']
+        return id_trabajo['id']
+
+    return [
+        ('GET /', lambda i: ('GET', '/', None, None)),
+        ('GET /routes', lambda i: ('GET', '/routes', None, None)),
+
+        ('POST /api/votante', lambda i: ('POST', '/api/votante/', nuevo_votante(i), None)),
+        ('GET /api/votante', lambda i: ('GET', '/api/votante/', None, None)),
+        ('GET /api/votante/<id>', lambda i: ('GET', f'/api/votante/{votante()}', None, None)),
+        ('GET /api/votante/correo/<correo>', lambda i: ('GET', f'/api/votante/correo/{correo_votante()}', None, None)),
+        ('GET /api/votante/<id>/recomendaciones', lambda i: (
+            'GET', f'/api/votante/{votante()}/recomendaciones', None, None)),
+        ('POST /api/votante/login', lambda i: (
+            'POST', '/api/votante/login/', {'correo': correo_votante(), 'password': PASSWORD}, None)),
+        ('POST /api/votante/logout', lambda i: ('POST', '/api/votante/logout/', None, token())),
+        ('PUT /api/votante/manual/<id>', lambda i: (
+            'PUT', f'/api/votante/manual/{votante()}', {'ciudad': f'Ciudad {i}'}, token())),
+        ('PUT /api/votante/<id>', lambda i: ('PUT', f'/api/votante/{votante()}', {'colonia': f'Colonia {i}'}, None)),
+        ('PUT /api/votante/<id> (valoracion)', lambda i: (
+            'PUT', f'/api/votante/{votante()}',
+            {'valoracion': {str(c): valoracion(rng) for c in range(1, len(CATEGORIAS) + 1)}}, None)),
+        ('DELETE /api/votante/<id>', lambda i: (
+            'DELETE', f'/api/votante/{desechable("v_votantes", nuevo_votante(i))}', None, None)),
+        ('GET /api/votante/preguntas', lambda i: ('GET', '/api/votante/preguntas', None, None)),
+
+        ('POST /api/politico', lambda i: ('POST', '/api/politico/', nuevo_politico(i), None)),
+        ('GET /api/politico', lambda i: ('GET', '/api/politico/', None, None)),
+        ('GET /api/politico/<id>', lambda i: ('GET', f'/api/politico/{politico()}', None, None)),
+        ('GET /api/politico/correo/<correo>', lambda i: (
+            'GET', f'/api/politico/correo/politico{rng.randrange(len(ids["politicos"]))}@benchmark.mx', None, None)),
+        ('PUT /api/politico/<id>', lambda i: ('PUT', f'/api/politico/{politico()}', {'colonia': f'Colonia {i}'}, None)),
+        ('DELETE /api/politico/<id>', lambda i: (
+            'DELETE', f'/api/politico/{desechable("v_politicos", nuevo_politico(i))}', None, None)),
+
+        ('GET /api/propuesta', lambda i: ('GET', '/api/propuesta/', None, None)),
+        ('GET /api/propuesta?stream=ndjson', lambda i: ('GET', '/api/propuesta/?stream=ndjson', None, None)),
+        ('GET /api/propuesta/ultimas', lambda i: ('GET', '/api/propuesta/ultimas', None, None)),
+        ('GET /api/propuesta/<id>', lambda i: ('GET', f'/api/propuesta/{propuesta()}', None, None)),
+        ('GET /api/propuesta/politico/<id>', lambda i: ('GET', f'/api/propuesta/politico/{politico()}', None, None)),
+        ('POST /api/propuesta', lambda i: ('POST', '/api/propuesta/', nueva_propuesta(i), None)),
+        ('POST /api/propuesta/async', lambda i: ('POST', '/api/propuesta/async', nueva_propuesta(i), None)),
+        ('GET /api/propuesta/trabajo/<id>', lambda i: ('GET', f'/api/propuesta/trabajo/{trabajo()}', None, None)),
+        ('PUT /api/propuesta/<id>', lambda i: ('PUT', f'/api/propuesta/{propuesta()}', {'titulo': f'Título {i}'}, None)),
+        ('DELETE /api/propuesta/<id>', lambda i: (
+            'DELETE', f'/api/propuesta/{desechable("v_propuestas", dict(nueva_propuesta(i), total_votos=0))}',
+            None, None)),
+        ('POST /api/propuesta/vote', lambda i: (
+            'POST', '/api/propuesta/vote', {'id_propuesta': str(propuesta()), 'id_votante': str(votante())}, None)),
+        ('POST /api/propuesta/vote/batch', lambda i: ('POST', '/api/propuesta/vote/batch', {'votos': [
+            {'id_propuesta': str(propuesta()), 'id_votante': str(votante())} for _ in range(100)
+        ]}, None)),
+        ('POST /api/propuesta/unvote', lambda i: ('POST', '/api/propuesta/unvote', dict(zip(
+            ('id_propuesta', 'id_votante'), map(str, voto_existente()))), None)),
+        ('GET /api/propuesta/<id>/votos', lambda i: ('GET', f'/api/propuesta/{propuesta()}/votos', None, None)),
+
+        ('GET /api/administrador', lambda i: ('GET', '/api/administrador/', None, None)),
+        ('GET /api/administrador/<id>', lambda i: (
+            'GET', f'/api/administrador/{rng.choice(ids["administradores"])}', None, None)),
+        ('GET /api/administrador/correo/<correo>', lambda i: (
+            'GET', f'/api/administrador/correo/administrador{rng.randrange(len(ids["administradores"]))}@benchmark.mx',
+            None, None)),
+
+        ('GET /api/estadisticas/dashboard', lambda i: ('GET', '/api/estadisticas/dashboard', None, None)),
+        ('GET /api/estadisticas/cache', lambda i: ('GET', '/api/estadisticas/cache', None, None)),
+        ('GET /api/estadisticas/ranking/propuestas', lambda i: (
+            'GET', '/api/estadisticas/ranking/propuestas?n=20', None, None)),
+        ('GET /api/estadisticas/ranking/politicos', lambda i: (
+            'GET', '/api/estadisticas/ranking/politicos?n=20', None, None)),
+        ('GET /api/estadisticas/ranking/categorias', lambda i: ('GET', '/api/estadisticas/ranking/categorias', None, None)),
+
+        ('GET /api/metrics', lambda i: ('GET', '/api/metrics', None, None)),
+
+        ('GET /api/exportar/votos', lambda i: ('GET', '/api/exportar/votos', None, None)),
+        ('GET /api/exportar/votos?formato=csv', lambda i: ('GET', '/api/exportar/votos?formato=csv', None, None)),
+
+        ('POST /api/importar/<tipo>', lambda i: (
+            'POST', '/api/importar/votantes?formato=ndjson', archivo_importacion(i), None)),
+        ('GET /api/importar/<id>', lambda i: ('GET', f'/api/importar/{importacion()}', None, None)),
+        ('GET /api/importar/<id>/errores', lambda i: ('GET', f'/api/importar/{importacion()}/errores', None, None)),
+    ]
+
+
+def enviar(cliente, metodo, url, cuerpo, cabeceras):
+    if isinstance(cuerpo, bytes):
+        return cliente.open(url, method=metodo, data=cuerpo, headers=cabeceras)
+    return cliente.open(url, method=metodo, json=cuerpo, headers=cabeceras)
+
+
+def medir(cliente, contador, peticion, n, calentamiento):
+    """Ejecuta n peticiones (más el calentamiento, que no se mide) y resume sus tiempos."""
+    for i in range(calentamiento):
+        metodo, url, cuerpo, cabeceras = peticion(-1 - i)
+        enviar(cliente, metodo, url, cuerpo, cabeceras).get_data()
+
+    tiempos = []
+    consultas = 0
+    respuestas_4xx = 0
+    respuestas_5xx = 0
+    for i in range(n):
+        metodo, url, cuerpo, cabeceras = peticion(i)
+        antes = contador.total
+        inicio = time.perf_counter()
+        respuesta = enviar(cliente, metodo, url, cuerpo, cabeceras)
+        respuesta.get_data()
+        tiempos.append(time.perf_counter() - inicio)
+        consultas += contador.total - antes
+        if respuesta.status_code >= 500:
+            respuestas_5xx += 1
+        elif respuesta.status_code >= 400:
+            respuestas_4xx += 1
+
+    total = sum(tiempos)
+    return {
+        'peticiones': n,
+        'p50_ms': round(percentil(tiempos, 50) * 1000, 3),
+        'p95_ms': round(percentil(tiempos, 95) * 1000, 3),
+        'p99_ms': round(percentil(tiempos, 99) * 1000, 3),
+        'media_ms': round(total / n * 1000, 3),
+        'peticiones_por_segundo': round(n / total, 1) if total else None,
+        'consultas_por_peticion': round(consultas / n, 2) if contador.activo else None,
+        'respuestas_4xx': respuestas_4xx,
+        'respuestas_5xx': respuestas_5xx,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--votantes', type=int, default=5000)
+    parser.add_argument('--politicos', type=int, default=100)
+    parser.add_argument('--propuestas', type=int, default=1000)
+    parser.add_argument('--votos', type=int, default=20, help='votos promedio por propuesta')
+    parser.add_argument('--peticiones', type=int, default=200, help='peticiones medidas por ruta')
+    parser.add_argument('--calentamiento', type=int, default=5)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--rutas', default='', help='solo las rutas cuyo nombre contenga este texto')
+    parser.add_argument('--mongo-uri', default='mongodb://localhost:27017/autovote_benchmark')
+    parser.add_argument('--mongomock', action='store_true', help='usar una base en memoria (mongomock)')
+    parser.add_argument('--salida', default='benchmark_endpoints.json')
+    args = parser.parse_args()
+
+    # La app lee la configuración al importarse
+    os.environ['MONGO_URI'] = args.mongo_uri
+    os.environ['MODELO_EVALUACION'] = 'local'
+    os.environ.setdefault('SECRET_KEY', 'benchmark-' + 'x' * 32)
+
+    contador = ContadorConsultas(activo=not args.mongomock)
+    monitoring.register(contador)
+    if args.mongomock:
+        usar_mongomock()
+
+    from app import create_app, mongo
+    from app.hashing import hash_password
+
+    app = create_app()
+    rng = random.Random(args.semilla)
+
+    with app.app_context():
+        inicio = time.perf_counter()
+        ids = sembrar(mongo.db, args, rng, hash_password(PASSWORD))
+        print(f'Datos sembrados en {time.perf_counter() - inicio:.1f} s: {args.votantes} votantes, '
+              f'{args.politicos} políticos, {args.propuestas} propuestas, {ids["total_votos"]} votos\n')
+
+        cliente = app.test_client()
+        # Un trabajo de creación para GET /api/propuesta/trabajo/<id>
+        cliente.post('/api/propuesta/', json={
+            'id_politico': str(ids['politicos'][0]), 'titulo': 'Propuesta inicial',
+            'descripcion': 'Propuesta creada antes de medir las rutas.', 'categoria': CATEGORIAS[0],
+        })
+
+        if args.rutas in 'GET /api/votante/<id>/recomendaciones':
+            inicio = time.perf_counter()
+            esperar_recomendaciones(cliente, ids)
+            print(f'Índice de recomendaciones cargado en {time.perf_counter() - inicio:.1f} s\n')
+
+        resultados = {}
+        print(f'{"ruta":<46} {"p50":>9} {"p95":>9} {"p99":>9} {"req/s":>9} {"consultas":>9} {"4xx":>5} {"5xx":>5}')
+        for nombre, peticion in escenarios(mongo.db, ids, rng, cliente):
+            if args.rutas not in nombre:
+                continue
+            r = medir(cliente, contador, peticion, args.peticiones, args.calentamiento)
+            resultados[nombre] = r
+            consultas = '-' if r['consultas_por_peticion'] is None else f'{r["consultas_por_peticion"]:.1f}'
+            print(f'{nombre:<46} {r["p50_ms"]:7.2f}ms {r["p95_ms"]:7.2f}ms {r["p99_ms"]:7.2f}ms '
+                  f'{r["peticiones_por_segundo"] or 0:9.1f} {consultas:>9} {r["respuestas_4xx"]:5} {r["respuestas_5xx"]:5}')
+
+    informe = {
+        'fecha': datetime.now(timezone.utc).isoformat(),
+        'entorno': {
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'base_de_datos': 'mongomock' if args.mongomock else args.mongo_uri.rsplit('@', 1)[-1],
+        },
+        'datos': {
+            'semilla': args.semilla,
+            'votantes': args.votantes,
+            'politicos': args.politicos,
+            'propuestas': args.propuestas,
+            'votos': ids['total_votos'],
+        },
+        'peticiones_por_ruta': args.peticiones,
+        'rutas': resultados,
+    }
+    with open(args.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(informe, archivo, ensure_ascii=False, indent=2)
+    print(f'\nResultados guardados en {args.salida}')
+
+
+if __name__ == '__main__':
+    main()
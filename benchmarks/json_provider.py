@@ -0,0 +1,104 @@
+"""
+Benchmark: serialización de listados grandes de documentos de MongoDB.
+
+Compara el camino anterior (convertir _id a string en un bucle de Python y
+serializar con el proveedor BSON de Flask-PyMongo) con BSONJSONProvider de
+app/json_provider.py, con orjson y con el módulo json estándar.
+
+Uso:
+    python benchmarks/json_provider.py --documentos 20000 --repeticiones 5
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bson import ObjectId  # noqa: E402
+from flask import Flask  # noqa: E402
+from flask_pymongo.helpers import BSONProvider  # noqa: E402
+from app import json_provider  # noqa: E402
+from app.json_provider import BSONJSONProvider  # noqa: E402
+
+
+def generar_propuestas(n):
+    """Propuestas sintéticas con el político adjunto, como las devuelve GET /api/propuesta."""
+    politicos = [
+        {'_id': ObjectId(), 'nombre': f'Nombre {i}', 'apellido': f'Apellido {i}', 'edad': 40,
+         'correo': f'politico{i}@ejemplo.com', 'candidatura': 'gobernador', 'validacion': 'valida'}
+        for i in range(50)
+    ]
+    return [
+        {
+            '_id': ObjectId(),
+            'id_politico': politicos[i % 50]['_id'],
+            'titulo': f'Propuesta número {i}',
+            'descripcion': 'Descripción de la propuesta para mejorar los servicios públicos. ' * 3,
+            'categoria': 'Salud',
+            'valoracion': [5, 4, 3],
+            'total_votos': i,
+            'fecha_creacion': datetime.now(timezone.utc),
+            'politico': politicos[i % 50],
+        }
+        for i in range(n)
+    ]
+
+
+def copiar(propuestas):
+    return [dict(p, politico=dict(p['politico'])) for p in propuestas]
+
+
+def anterior(app, propuestas):
+    # Bucle de conversión por documento que hacían las rutas + proveedor de Flask-PyMongo
+    for propuesta in propuestas:
+        propuesta['_id'] = str(propuesta['_id'])
+        propuesta['politico']['_id'] = str(propuesta['politico']['_id'])
+    return app.json.response(propuestas).get_data()
+
+
+def nuevo(app, propuestas):
+    return app.json.response(propuestas).get_data()
+
+
+def medir(nombre, funcion, proveedor, datos, repeticiones):
+    app = Flask(__name__)
+    app.json = proveedor(app)
+    tiempos = []
+    with app.app_context():
+        for _ in range(repeticiones):
+            propuestas = copiar(datos)
+            inicio = time.perf_counter()
+            cuerpo = funcion(app, propuestas)
+            tiempos.append(time.perf_counter() - inicio)
+    mejor = min(tiempos)
+    print(f'{nombre:<34} {mejor * 1000:9.1f} ms  {len(cuerpo) / 1e6:6.2f} MB')
+    return mejor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--documentos', type=int, default=20000)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    datos = generar_propuestas(args.documentos)
+    print(f'{args.documentos} propuestas, mejor de {args.repeticiones} repeticiones\n')
+
+    base = medir('anterior (str() + json_util)', anterior, BSONProvider, datos, args.repeticiones)
+    with mock.patch.object(json_provider, 'orjson', None):
+        estandar = medir('BSONJSONProvider (json estándar)', nuevo, BSONJSONProvider, datos, args.repeticiones)
+    resultados = [('json estándar', estandar)]
+    if json_provider.orjson is not None:
+        rapido = medir('BSONJSONProvider (orjson)', nuevo, BSONJSONProvider, datos, args.repeticiones)
+        resultados.append(('orjson', rapido))
+
+    print()
+    for nombre, tiempo in resultados:
+        print(f'Aceleración con {nombre}: {base / tiempo:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
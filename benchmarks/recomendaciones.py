@@ -0,0 +1,102 @@
+"""
+Benchmark: recomendaciones por similitud para todo el padrón.
+
+Construye en memoria (sin MongoDB) un índice de recomendaciones con votantes y
+propuestas sintéticos y mide:
+- el cálculo por votante en Python (comparar su valoración con cada propuesta,
+  como el emparejamiento actual), medido en una muestra y extrapolado al padrón;
+- IndiceRecomendaciones.recomendar (un votante, como GET /api/votante/<id>/recomendaciones);
+- IndiceRecomendaciones.recomendar_todos (todo el padrón por bloques con numpy).
+
+Uso:
+    python benchmarks/recomendaciones.py --votantes 100000 --propuestas 5000 --k 10
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+os.environ.setdefault('MONGO_URI', 'mongodb://localhost:27017/autovote_benchmark')
+
+from bson import ObjectId  # noqa: E402
+from app import create_app  # noqa: E402
+
+create_app()  # Inicializa la conexión que app.recomendaciones necesita al importarse
+
+from app.recomendaciones import CATEGORIA_MAP, IndiceRecomendaciones  # noqa: E402
+
+CATEGORIAS = list(CATEGORIA_MAP)
+
+
+def valoracion(rng):
+    return [rng.randint(1, 5) for _ in range(3)]
+
+
+def generar(rng, n_votantes, n_propuestas):
+    votantes = [
+        {'_id': ObjectId(), 'valoracion': {str(c): valoracion(rng) for c in range(1, len(CATEGORIAS) + 1)}}
+        for _ in range(n_votantes)
+    ]
+    propuestas = [
+        {'_id': ObjectId(), 'categoria': rng.choice(CATEGORIAS), 'valoracion': valoracion(rng)}
+        for _ in range(n_propuestas)
+    ]
+    return votantes, propuestas
+
+
+def por_votante(votante, propuestas, k):
+    """Un votante a la vez en Python puro."""
+    puntajes = []
+    for propuesta in propuestas:
+        respuestas = votante['valoracion'].get(str(CATEGORIA_MAP[propuesta['categoria']]))
+        if respuestas:
+            distancia = math.sqrt(sum((a - b) ** 2 for a, b in zip(respuestas, propuesta['valoracion'])))
+            puntajes.append((1 / (1 + distancia), propuesta['_id']))
+    puntajes.sort(key=lambda p: p[0], reverse=True)
+    return puntajes[:k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--votantes', type=int, default=100000)
+    parser.add_argument('--propuestas', type=int, default=5000)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--muestra', type=int, default=200, help='votantes medidos con el cálculo en Python')
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.semilla)
+    votantes, propuestas = generar(rng, args.votantes, args.propuestas)
+    print(f'{args.votantes} votantes, {args.propuestas} propuestas, k={args.k}\n')
+
+    inicio = time.perf_counter()
+    indice = IndiceRecomendaciones.desde_documentos(votantes, propuestas)
+    print(f'Carga del índice:                    {time.perf_counter() - inicio:8.2f} s')
+
+    muestra = votantes[:args.muestra]
+    inicio = time.perf_counter()
+    for votante in muestra:
+        por_votante(votante, propuestas, args.k)
+    python = (time.perf_counter() - inicio) / len(muestra)
+    print(f'Python, un votante:                  {python * 1000:8.2f} ms')
+    print(f'Python, todo el padrón (estimado):   {python * args.votantes:8.1f} s')
+
+    inicio = time.perf_counter()
+    for votante in muestra:
+        indice.recomendar(votante['_id'], args.k)
+    uno = (time.perf_counter() - inicio) / len(muestra)
+    print(f'numpy, un votante (recomendar):      {uno * 1000:8.2f} ms')
+
+    inicio = time.perf_counter()
+    total = sum(1 for _ in indice.recomendar_todos(args.k))
+    todos = time.perf_counter() - inicio
+    print(f'numpy, todo el padrón:               {todos:8.1f} s  ({total} votantes)')
+    print(f'\nAceleración en todo el padrón: {python * args.votantes / todos:.0f}x')
+
+
+if __name__ == '__main__':
+    main()
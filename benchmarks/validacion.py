@@ -0,0 +1,88 @@
+"""
+Benchmark: validación de los datos de las rutas de escritura.
+
+Compara el camino anterior (schema.validate(data, partial=True) sobre la instancia
+del módulo y después escribir el data original) con el actual (una sola carga con
+la instancia parcial compartida de app/schemas.py, que devuelve los datos limpios),
+para create_votante, update_votante, update_politico y update_propuesta. También
+mide la validación de muchos registros con cargar_lote frente a un registro por vez.
+Como referencia, la columna "instancia nueva" crea el esquema en cada validación,
+que es el costo que evitan las instancias compartidas.
+
+Uso:
+    python benchmarks/validacion.py --registros 20000 --repeticiones 5
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.schemas import (  # noqa: E402
+    PoliticoSchema, PropuestaSchema, VotanteSchema, cargar, cargar_lote, obtener_esquema
+)
+
+VOTANTE = {
+    'nombre': 'Ana', 'apellido': 'López', 'edad': 30, 'correo': 'ana@ejemplo.com',
+    'password': 'secreto123', 'codigo_postal': '44100', 'colonia': 'Centro',
+    'ciudad': 'Guadalajara', 'estado': 'Jalisco',
+    'preferencias': [{'categoria': 'Salud', 'respuestas': [4, 2, 5]}] * 5,
+}
+CASOS = [
+    # (ruta, esquema, parcial, datos)
+    ('create_votante', VotanteSchema, False, VOTANTE),
+    ('update_votante', VotanteSchema, True, {'ciudad': 'Zapopan', 'edad': 31, 'preferencias': VOTANTE['preferencias']}),
+    ('update_politico', PoliticoSchema, True, {'candidatura': 'gobernador', 'validacion': 'valida'}),
+    ('update_propuesta', PropuestaSchema, True, {'titulo': 'Nuevo título', 'descripcion': 'Una descripción más larga'}),
+]
+
+
+def anterior(esquema, parcial, datos):
+    errores = esquema.validate(datos, partial=parcial)
+    return None if errores else datos
+
+
+def actual(esquema, datos):
+    limpios, errores = cargar(esquema, datos)
+    return limpios
+
+
+def medir(funcion, registros, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(registros)
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--registros', type=int, default=20000)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f'{args.registros} validaciones por ruta, mejor de {args.repeticiones} repeticiones\n')
+    print(f'{"ruta":<18} {"instancia nueva µs":>19} {"anterior µs":>12} {"actual µs":>10} {"aceleración":>12}')
+    for ruta, clase, parcial, datos in CASOS:
+        registros = [dict(datos) for _ in range(args.registros)]
+        instancia = clase()
+        compartida = obtener_esquema(clase, parcial)
+        sin_cache = medir(lambda rs: [actual(clase(partial=parcial), r) for r in rs], registros, args.repeticiones)
+        base = medir(lambda rs: [anterior(instancia, parcial, r) for r in rs], registros, args.repeticiones)
+        nuevo = medir(lambda rs: [actual(compartida, r) for r in rs], registros, args.repeticiones)
+        print(f'{ruta:<18} {sin_cache / args.registros * 1e6:19.1f} {base / args.registros * 1e6:12.1f} '
+              f'{nuevo / args.registros * 1e6:10.1f} {base / nuevo:11.2f}x')
+
+    # Validación de muchos registros (importación masiva)
+    registros = [dict(VOTANTE, correo=f'votante{i}@ejemplo.com') for i in range(args.registros)]
+    instancia = VotanteSchema()
+    base = medir(lambda rs: [anterior(instancia, False, r) for r in rs], registros, args.repeticiones)
+    lote = medir(lambda rs: cargar_lote(obtener_esquema(VotanteSchema), enumerate(rs)), registros, args.repeticiones)
+    print(f'\nLote de {args.registros} votantes: anterior {base * 1000:.1f} ms, '
+          f'cargar_lote {lote * 1000:.1f} ms ({base / lote:.2f}x)')
+
+
+if __name__ == '__main__':
+    main()
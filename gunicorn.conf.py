@@ -0,0 +1,33 @@
+# Configuración de gunicorn para producción:  gunicorn -c gunicorn.conf.py
+#
+# Cada worker es un proceso independiente que importa la app DESPUÉS del fork
+# (preload_app = False): así cada uno crea su propio MongoClient, sus pools de hilos
+# y su bucle asíncrono, sin compartir sockets con el proceso maestro.
+from app.config import Config
+
+wsgi_app = 'wsgi:app'
+bind = f'0.0.0.0:{Config.PORT}'
+
+# Procesos (escalan con los núcleos) y hilos por proceso para las esperas de E/S
+workers = Config.SERVIDOR_WORKERS
+threads = Config.SERVIDOR_THREADS
+worker_class = 'gthread'
+timeout = Config.SERVIDOR_TIMEOUT
+graceful_timeout = Config.SERVIDOR_TIMEOUT
+
+# No cargar la app en el maestro: el cliente de MongoDB no es seguro entre forks
+preload_app = False
+
+# Reciclar los workers de forma escalonada para evitar que reconecten todos a la vez
+max_requests = 10000
+max_requests_jitter = 1000
+
+accesslog = '-'
+errorlog = '-'
+
+
+def worker_exit(server, worker):
+    """Cierra las conexiones del worker a MongoDB al terminar."""
+    from app import mongo
+    if getattr(mongo, 'cx', None) is not None:
+        mongo.cx.close()
@@ -0,0 +1,5 @@
+from app import create_app  # Importamos la función que crea la app Flask configurada
+
+# Punto de entrada WSGI para producción (gunicorn -c gunicorn.conf.py).
+# Cada worker importa este módulo después del fork y crea su propia app y su propio cliente de MongoDB.
+app = create_app()